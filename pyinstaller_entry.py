@@ -1,5 +1,8 @@
+import multiprocessing
+
 from all_seeing_eye.app import main
 
 if __name__ == "__main__":
+    # Bulk import spawns worker processes; a frozen app must not re-run main() in them.
+    multiprocessing.freeze_support()
     raise SystemExit(main())
-
@@ -2,37 +2,118 @@ from __future__ import annotations
 
 import argparse
 import sys
+import threading
 from typing import Optional
 
 from PySide6 import QtCore, QtWidgets
 
-from .core.controller import IngestController
-from .core.ingest import parse_diagnostics_line, to_log_entry
+from .core.batching import EntryBatcher
+from .core.columnar import HAS_NUMPY, ColumnarHistory
+from .core.controller import IngestController, parse_project_arg
+from .core.dedupe import DEFAULT_DEDUPE_WINDOW_S, add_dedupe_arguments, deduplicator_from_args
+from .core.dispatch import add_dispatch_arguments, dispatch_from_args
+from .core.file_tail import TailOffsets, add_tail_arguments
+from .core.ingest import iter_log_entries_bytes
+from .core.journal import LogJournal
 from .core.log_store import LogStore
-from .core.logger import emit
+from .core.logger import LEVELS, emit, set_level
 from .core.notifier import Notifier
 from .core.notifier_macos import MacOSNotifier
+from .core.notify_scheduler import add_notify_arguments, scheduler_from_args
+from .core.ws_limits import add_ws_limit_arguments, ws_limits_from_args
 from .ui.main_window import MainWindow
+from .ui.models import DEFAULT_MAX_ROWS
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="All Seeing Eye diagnostics viewer")
-    parser.add_argument("--project", help="Path to Expo project (runs Metro)")
+    parser.add_argument(
+        "--project",
+        action="append",
+        help="Path to Expo project (runs Metro); repeat for several projects, DIR:PORT picks the port",
+    )
     parser.add_argument("--stdin", action="store_true", help="Read logs from stdin")
+    parser.add_argument(
+        "--import",
+        dest="import_paths",
+        nargs="+",
+        metavar="FILE",
+        help="Bulk-import saved logs, parsed in parallel and merged by timestamp ('-' reads stdin)",
+    )
+    parser.add_argument(
+        "--import-workers", type=int, help="Parser processes for --import (default: one per CPU)"
+    )
+    add_tail_arguments(parser)
     parser.add_argument("--ws", action="store_true", help="Start WebSocket ingest server")
     parser.add_argument("--ws-host", default="127.0.0.1", help="WebSocket host")
     parser.add_argument("--ws-port", type=int, default=8765, help="WebSocket port")
+    add_ws_limit_arguments(parser)
+    parser.add_argument(
+        "--log-level",
+        choices=sorted(LEVELS, key=LEVELS.get),
+        help="Minimum level of All Seeing Eye's own log lines (default: $ALL_SEEING_EYE_LOG_LEVEL or info)",
+    )
+    add_dedupe_arguments(parser, default_window_s=DEFAULT_DEDUPE_WINDOW_S)
+    add_dispatch_arguments(parser)
+    add_notify_arguments(parser)
+    parser.add_argument("--journal", help="Directory for the persistent log journal")
+    parser.add_argument(
+        "--replay", type=int, default=2000, help="Entries to replay from the journal on startup"
+    )
+    parser.add_argument(
+        "--ui-max-rows", type=int, default=DEFAULT_MAX_ROWS, help="Rows kept in the log view (0 = unlimited)"
+    )
+    parser.add_argument(
+        "--ui-spill", action="store_true", help="Spill rows evicted from the log view to disk"
+    )
+    parser.add_argument(
+        "--columnar-rows",
+        type=int,
+        default=100_000,
+        help="Entries kept in the NumPy columnar history for fast filters and stats (0 = off)",
+    )
     return parser
 
 
 def main(argv: Optional[list[str]] = None) -> int:
     args = build_arg_parser().parse_args(argv)
-
-    store = LogStore(max_history=2000)
+    if args.log_level:
+        set_level(args.log_level)
+
+    journal = LogJournal(args.journal) if args.journal else None
+    store = LogStore(
+        max_history=2000,
+        journal=journal,
+        dedupe=deduplicator_from_args(args),
+        dispatch=dispatch_from_args(args),
+    )
+    if journal:
+        store.restore(journal.tail(args.replay))
+
+    columnar = None
+    if args.columnar_rows > 0:
+        if HAS_NUMPY:
+            columnar = ColumnarHistory(args.columnar_rows)
+            columnar.attach(store)
+        else:
+            emit("warn", "ColumnarUnavailable", {"reason": "numpy not installed"})
 
     app = QtWidgets.QApplication(sys.argv)
-    controller = IngestController(store, host=args.ws_host, port=args.ws_port)
-    window = MainWindow(store, controller)
+    controller = IngestController(
+        store,
+        host=args.ws_host,
+        port=args.ws_port,
+        ws_limits=ws_limits_from_args(args),
+        tail_offsets=TailOffsets(args.tail_state) if args.tail_state else None,
+    )
+    window = MainWindow(
+        store,
+        controller,
+        max_rows=args.ui_max_rows,
+        spill_to_disk=args.ui_spill,
+        journal_dir=args.journal,
+        columnar=columnar,
+    )
 
     def handle_action(action: str) -> None:
         if action == "open_diagnostics":
@@ -41,31 +122,45 @@ def main(argv: Optional[list[str]] = None) -> int:
     notifier: Notifier
     notifier = MacOSNotifier(handle_action)
 
-    def on_entry(entry, _history):
-        if entry.level in {"error", "warn"}:
-            notifier.notify(entry)
-
-    store.subscribe(on_entry)
+    # Warns/errors are queued for the scheduler's worker; ingest never waits on notifications.
+    scheduler = scheduler_from_args(notifier, args)
+    store.subscribe_batch(scheduler.submit_many)
+    # Qt runs these in connection order: producers stop before the scheduler.
+    app.aboutToQuit.connect(window.cancel_import)
+    app.aboutToQuit.connect(controller.close)
+    app.aboutToQuit.connect(scheduler.close)
 
     if args.project:
-        controller.start_metro(args.project)
+        for project in args.project:
+            project_dir, port = parse_project_arg(project)
+            controller.start_metro(project_dir, port=port)
     elif args.stdin:
-        emit("info", "StdinMode", {})
-        for line in sys.stdin:
-            payload = parse_diagnostics_line(line)
-            if not payload:
-                continue
-            entry = to_log_entry(payload, source="stdin")
-            store.add(entry)
+        # Read on a background thread so a large pipe never holds up the window.
+        threading.Thread(target=_read_stdin, args=(store,), name="ase-stdin", daemon=True).start()
     elif args.ws:
         controller.start_ws()
-    else:
+    elif not (args.import_paths or args.tail):
         emit("warn", "NoSourceConfigured", {})
+    for path in args.tail or []:
+        controller.start_tail(path, from_end=args.tail_from_end)
 
     window.show()
+    if args.import_paths:
+        window.import_files(args.import_paths, workers=args.import_workers)
     # macOS can launch the app without focusing the first window (especially from Finder).
     QtCore.QTimer.singleShot(0, window.focus_diagnostics)
-    return app.exec()
+    code = app.exec()
+    # Only once every producer has stopped, so their final batches are journaled.
+    if journal:
+        journal.close()
+    return code
+
+
+def _read_stdin(store: LogStore) -> None:
+    emit("info", "StdinMode", {})
+    with EntryBatcher(store) as batcher:
+        for entry in iter_log_entries_bytes(sys.stdin.buffer, source="stdin"):
+            batcher.add(entry)
 
 
 if __name__ == "__main__":
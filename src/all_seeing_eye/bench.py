@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from .core.ingest import JSON_BACKEND, iter_log_entries, iter_log_entries_bytes
+from .core.log_types import new_entry
+from .core.notifier import NullNotifier
+from .core.notify_scheduler import NotificationScheduler
+
+_NOISE = [
+    "Starting Metro Bundler",
+    "iOS Bundled 1532ms index.js (1203 modules)",
+    " LOG  [expo-router] navigating to /home",
+    " WARN  Require cycle: src/state/store.ts -> src/state/slices.ts -> src/state/store.ts",
+    "› Press r │ reload app",
+    " ERROR  TypeError: Cannot read property 'map' of undefined",
+]
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="All Seeing Eye microbenchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    parse = sub.add_parser("parse", help="Lines/sec for realistic Metro output")
+    parse.add_argument("--lines", type=int, default=200_000, help="Lines per run")
+    parse.add_argument("--diagnostics-ratio", type=float, default=0.3, help="Share of [Diagnostics] lines")
+    parse.add_argument("--repeat", type=int, default=3, help="Runs per variant; best is reported")
+    memory = sub.add_parser("memory", help="Bytes per LogEntry vs the previous dataclass layout")
+    memory.add_argument("--entries", type=int, default=1_000_000, help="Entries to allocate")
+    notify = sub.add_parser("notify", help="Notification scheduler cost and output under an error storm")
+    notify.add_argument("--entries", type=int, default=500_000, help="Entries submitted")
+    notify.add_argument("--fingerprints", type=int, default=50, help="Distinct warn/error messages")
+    notify.add_argument("--error-ratio", type=float, default=0.5, help="Share of warn/error entries")
+    notify.add_argument("--rollup", type=float, default=0.2, help="Rollup window in seconds")
+    notify.add_argument("--max-per-minute", type=int, default=600, help="Global notification cap")
+    return parser
+
+
+@dataclass(frozen=True)
+class _LegacyLogEntry:
+    """The pre-slots layout: UUID string id, datetime timestamp, per-instance strings."""
+
+    id: str
+    timestamp: datetime
+    level: str
+    message: str
+    data: Optional[Dict[str, Any]] = None
+    source: str = "metro"
+
+
+def metro_lines(count: int, diagnostics_ratio: float, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        if rng.random() >= diagnostics_ratio:
+            lines.append(rng.choice(_NOISE) + "\n")
+            continue
+        payload = {
+            "ts": f"2026-02-06T16:33:{i // 1000 % 60:02d}.{i % 1000:03d}Z",
+            "level": rng.choice(["debug", "info", "info", "warn", "error"]),
+            "message": rng.choice(["RenderCommit", "FetchFailed", "NavigationChange", "CacheMiss"]),
+            "data": {"screen": rng.choice(["home", "settings", "glucose"]), "ms": rng.randint(1, 900)},
+        }
+        lines.append(f" LOG  [Diagnostics] {json.dumps(payload)}\n")
+    return lines
+
+
+def _best_rate(run: Callable[[], int], line_count: int, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    entries = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        entries = run()
+        best = min(best, time.perf_counter() - start)
+    return line_count / best, entries
+
+
+def bench_parse(args: argparse.Namespace) -> None:
+    text_lines = metro_lines(args.lines, args.diagnostics_ratio)
+    byte_lines = [line.encode("utf-8") for line in text_lines]
+    variants = {
+        "text": lambda: sum(1 for _ in iter_log_entries(text_lines, source="metro")),
+        "bytes": lambda: sum(1 for _ in iter_log_entries_bytes(byte_lines, source="metro")),
+    }
+    print(f"json backend: {JSON_BACKEND}; {args.lines} lines, {args.diagnostics_ratio:.0%} diagnostics")
+    for name, run in variants.items():
+        rate, entries = _best_rate(run, len(text_lines), args.repeat)
+        print(f"  {name:<6} {rate:>12,.0f} lines/s  ({entries} entries)")
+
+
+def _bytes_per_entry(build: Callable[[int], object], count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = [build(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return (after - before) / count
+
+
+def bench_memory(args: argparse.Namespace) -> None:
+    levels = ["debug", "info", "warn", "error"]
+    now = datetime.now(timezone.utc)
+
+    def legacy(i: int) -> object:
+        # json.loads hands back a fresh string per value, so legacy levels/sources weren't shared.
+        return _LegacyLogEntry(
+            id=str(uuid.uuid4()),
+            timestamp=now.replace(microsecond=i % 1_000_000),
+            level="".join(levels[i % 4]),
+            message=f"message {i}",
+            source="".join("websocket"),
+        )
+
+    def compact(i: int) -> object:
+        return new_entry(
+            ts_ns=time.time_ns(),
+            level="".join(levels[i % 4]),
+            message=f"message {i}",
+            source="".join("websocket"),
+        )
+
+    legacy_bytes = _bytes_per_entry(legacy, args.entries)
+    compact_bytes = _bytes_per_entry(compact, args.entries)
+    print(f"{args.entries} entries (message strings included in both)")
+    print(f"  legacy  {legacy_bytes:>8.1f} bytes/entry")
+    print(f"  compact {compact_bytes:>8.1f} bytes/entry  ({legacy_bytes / compact_bytes:.1f}x smaller)")
+
+
+def bench_notify(args: argparse.Namespace) -> None:
+    rng = random.Random(7)
+    entries = []
+    for i in range(args.entries):
+        level = rng.choice(["warn", "error"]) if rng.random() < args.error_ratio else "info"
+        entries.append(
+            new_entry(ts_ns=time.time_ns(), level=level, message=f"Failure {rng.randrange(args.fingerprints)}")
+        )
+    notifier = NullNotifier()
+    scheduler = NotificationScheduler(notifier, rollup_s=args.rollup, max_per_minute=args.max_per_minute)
+    start = time.perf_counter()
+    for i in range(0, len(entries), 256):
+        scheduler.submit_many(entries[i : i + 256])
+    submitted = time.perf_counter() - start
+    # Let at least one rollup window pass so the summary path is exercised.
+    time.sleep(args.rollup * 1.5)
+    scheduler.close()
+    drained = time.perf_counter() - start
+    stats = scheduler.stats()
+    print(f"{args.entries} entries, {args.fingerprints} fingerprints, {args.error_ratio:.0%} warn/error")
+    print(f"  submit   {args.entries / submitted:>12,.0f} entries/s on the ingest thread")
+    print(f"  drained  {drained:>12.2f} s (incl. {args.rollup * 1.5:.2f} s wait)")
+    print(
+        f"  shown    {notifier.notified} individual, {notifier.summaries} summaries "
+        f"({stats['rolled_up']} rolled up, {stats['dropped']} over the queue cap)"
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    if args.bench == "parse":
+        bench_parse(args)
+    elif args.bench == "memory":
+        bench_memory(args)
+    elif args.bench == "notify":
+        bench_notify(args)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
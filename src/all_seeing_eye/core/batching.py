@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from .log_store import LogStore
+from .log_types import LogEntry
+
+
+class EntryBatcher:
+    """
+    Coalesce entries from a source and hand them to `LogStore.add_many` once
+    `max_batch` entries are pending or the oldest pending entry is `max_delay_s` old.
+    A background thread flushes partial batches so quiet sources are not delayed. With
+    `background`, full batches are left to that thread too, so a caller on the event loop
+    never runs `store.add_many` (and its inline subscribers and journal write) itself.
+    """
+
+    def __init__(
+        self,
+        store: LogStore,
+        max_batch: int = 256,
+        max_delay_s: float = 0.005,
+        background: bool = False,
+    ) -> None:
+        self._store = store
+        self._background = background
+        self._max_batch = max(1, max_batch)
+        self._max_delay_s = max_delay_s
+        self._pending: List[LogEntry] = []
+        self._deadline = 0.0
+        self._closed = False
+        self._cond = threading.Condition()
+        # Serializes take-and-deliver so batches reach the store in arrival order.
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, entry: LogEntry) -> None:
+        self.add_many((entry,))
+
+    def add_many(self, entries: Iterable[LogEntry]) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("EntryBatcher is closed")
+            if not self._pending:
+                self._deadline = time.monotonic() + self._max_delay_s
+                self._cond.notify()
+            self._pending.extend(entries)
+            full = len(self._pending) >= self._max_batch
+            if full and self._background:
+                self._deadline = 0.0
+                self._cond.notify()
+                full = False
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            if batch:
+                self._store.add_many(batch)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+
+    def __enter__(self) -> "EntryBatcher":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+            self.flush()
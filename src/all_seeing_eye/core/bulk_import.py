@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import gzip
+import heapq
+import multiprocessing
+import os
+import stat
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Any, BinaryIO, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .ingest import iter_diagnostics_lines, parse_entry_bytes, record_parsed
+from .log_store import LogStore
+from .log_types import LogEntry, new_entry
+from .logger import emit
+
+try:
+    import zstandard  # type: ignore
+
+    HAS_ZSTD = True
+except Exception:  # pragma: no cover
+    HAS_ZSTD = False
+
+IMPORT_CHUNK_BYTES = 8 * 1024 * 1024
+IMPORT_BATCH = 4096
+STDIN_PATH = "-"
+COMPRESSED_SUFFIXES = (".gz", ".zst")
+
+# (ts_ns, level, message, data, source): what a worker sends back per entry. Ids are
+# assigned by the importing process, after the merge, so they stay unique and ordered.
+_Row = Tuple[int, str, str, Optional[Dict[str, Any]], str]
+_row_ts = itemgetter(0)
+
+
+@dataclass
+class ImportProgress:
+    """
+    Running totals of an import. Byte counts are positions in the input files, so for
+    compressed inputs they track compressed bytes; `lines` counts decompressed lines.
+    """
+
+    bytes_done: int = 0
+    # 0 when any input has no known size (stdin, pipes).
+    bytes_total: int = 0
+    chunks: int = 0
+    lines: int = 0
+    diagnostics: int = 0
+    entries: int = 0
+    elapsed_s: float = 0.0
+    done: bool = False
+
+    @property
+    def fraction(self) -> Optional[float]:
+        if not self.bytes_total:
+            return None
+        return min(1.0, self.bytes_done / self.bytes_total)
+
+    @property
+    def failures(self) -> int:
+        """Diagnostics lines whose payload did not parse."""
+        return self.diagnostics - self.entries
+
+    @property
+    def lines_per_s(self) -> float:
+        return self.lines / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "lines": self.lines,
+            "diagnostics": self.diagnostics,
+            "entries": self.entries,
+            "failures": self.failures,
+            "bytes": self.bytes_done,
+            "seconds": round(self.elapsed_s, 3),
+            "lines_per_s": round(self.lines_per_s),
+        }
+
+
+def iter_line_chunks(stream: BinaryIO, chunk_bytes: int = IMPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    """Blocks of about `chunk_bytes` from `stream`, each ending on a line boundary."""
+    carry = b""
+    while True:
+        block = stream.read(chunk_bytes)
+        if not block:
+            break
+        cut = block.rfind(b"\n") + 1
+        if not cut:
+            carry += block
+            continue
+        yield carry + block[:cut]
+        carry = block[cut:]
+    if carry:
+        yield carry
+
+
+def parse_chunk(chunk: bytes, source: str) -> Tuple[List[_Row], int, int]:
+    """
+    Worker side: every diagnostics entry in `chunk`, in file order, plus the
+    chunk's line count and how many lines carried the diagnostics prefix.
+    """
+    rows: List[_Row] = []
+    diagnostics = 0
+    for line in iter_diagnostics_lines(chunk):
+        diagnostics += 1
+        entry = parse_entry_bytes(line, source)
+        if entry is not None:
+            rows.append((entry.ts_ns, entry.level, entry.message, entry.data, entry.source))
+    lines = chunk.count(b"\n") + (0 if chunk.endswith(b"\n") else 1)
+    return rows, lines, diagnostics
+
+
+def import_source(path: str) -> str:
+    if path == STDIN_PATH:
+        return "stdin"
+    name = os.path.basename(path)
+    for suffix in COMPRESSED_SUFFIXES:
+        if name.endswith(suffix):
+            return f"import:{name[: -len(suffix)]}"
+    return f"import:{name}"
+
+
+def open_log_file(path: str) -> Tuple[BinaryIO, BinaryIO]:
+    """
+    `(stream, raw)` for `path`: `stream` yields decompressed bytes for `.gz` and `.zst`
+    files and is read incrementally, `raw` is the file underneath (for progress).
+    """
+    if path == STDIN_PATH:
+        return sys.stdin.buffer, sys.stdin.buffer
+    if path.endswith(".zst") and not HAS_ZSTD:
+        raise ValueError(f"{path}: install zstandard to import .zst files")
+    raw = open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.GzipFile(fileobj=raw, mode="rb"), raw
+    if path.endswith(".zst"):
+        return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True), raw
+    return raw, raw
+
+
+class BulkImporter:
+    """
+    Imports saved logs (files, or stdin as "-") in bulk. Input is cut into line-aligned
+    chunks that a process pool parses in parallel. Each input's rows come back in file
+    order and the inputs are merged by timestamp into `store.add_many` (and so into the
+    journal, when the store has one), so rotated files such as `app.log.1` and `app.log`
+    interleave correctly. `.gz` and `.zst` files are decompressed as they are
+    read and at most `max_in_flight` chunks per input are queued at once, so memory stays
+    bounded for inputs of any size. With one worker, chunks are parsed in the calling thread.
+    """
+
+    def __init__(
+        self,
+        store: LogStore,
+        workers: Optional[int] = None,
+        chunk_bytes: int = IMPORT_CHUNK_BYTES,
+        on_progress: Optional[Callable[[ImportProgress], None]] = None,
+    ) -> None:
+        self._store = store
+        self._workers = max(1, workers or os.cpu_count() or 1)
+        self._chunk_bytes = max(1, chunk_bytes)
+        self._max_in_flight = self._workers * 2
+        self._on_progress = on_progress
+        self._progress = ImportProgress()
+        self._started = 0.0
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._pool: Optional[Executor] = None
+
+    @property
+    def progress(self) -> ImportProgress:
+        with self._lock:
+            progress = ImportProgress(**vars(self._progress))
+        if not progress.done:
+            progress.elapsed_s = time.monotonic() - self._started
+        return progress
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def run(self, paths: Sequence[str]) -> ImportProgress:
+        inputs = []
+        for path in paths:
+            try:
+                inputs.append((path, *open_log_file(path)))
+            except (OSError, ValueError) as exc:
+                emit("error", "ImportSkipped", {"input": path, "error": str(exc)})
+        self._started = time.monotonic()
+        self._progress = ImportProgress(bytes_total=self._total_bytes([raw for _, _, raw in inputs]))
+        emit("info", "ImportStarted", {"inputs": [path for path, _, _ in inputs], "workers": self._workers})
+        if self._workers > 1:
+            # Spawned workers: the app's Qt and event-loop threads make forking unsafe.
+            self._pool = ProcessPoolExecutor(self._workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            rows = heapq.merge(
+                *(self._parsed_rows(stream, raw, import_source(path)) for path, stream, raw in inputs),
+                key=_row_ts,
+            )
+            batch: List[LogEntry] = []
+            for row in rows:
+                batch.append(new_entry(*row))
+                if len(batch) >= IMPORT_BATCH:
+                    self._store.add_many(batch)
+                    batch = []
+            if batch:
+                self._store.add_many(batch)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+            for _, stream, raw in inputs:
+                if raw is not sys.stdin.buffer:
+                    stream.close()
+                    raw.close()
+        with self._lock:
+            self._progress.elapsed_s = time.monotonic() - self._started
+            self._progress.done = True
+        progress = self.progress
+        self._report(progress)
+        emit("info", "ImportDone", {**progress.report(), "cancelled": self._cancelled.is_set()})
+        return progress
+
+    @staticmethod
+    def _total_bytes(raws: Sequence[BinaryIO]) -> int:
+        total = 0
+        for raw in raws:
+            info = os.fstat(raw.fileno())
+            if not stat.S_ISREG(info.st_mode):
+                return 0
+            total += info.st_size
+        return total
+
+    def _parsed_rows(self, stream: BinaryIO, raw: BinaryIO, source: str) -> Iterator[_Row]:
+        pending: Deque[Tuple[Future, int]] = deque()
+        seekable = raw.seekable()
+        position = raw.tell() if seekable else 0
+        for chunk in iter_line_chunks(stream, self._chunk_bytes):
+            if self._cancelled.is_set():
+                break
+            # Progress follows the file underneath, which for compressed input is behind
+            # the decompressed chunk by at most the decompressor's read-ahead.
+            consumed = len(chunk)
+            if seekable:
+                consumed, position = raw.tell() - position, raw.tell()
+            pending.append((self._submit(chunk, source), consumed))
+            if len(pending) >= self._max_in_flight:
+                yield from self._collect(*pending.popleft(), source)
+        while pending and not self._cancelled.is_set():
+            yield from self._collect(*pending.popleft(), source)
+
+    def _submit(self, chunk: bytes, source: str) -> Future:
+        if self._pool is not None:
+            return self._pool.submit(parse_chunk, chunk, source)
+        future: Future = Future()
+        future.set_result(parse_chunk(chunk, source))
+        return future
+
+    def _collect(self, future: Future, consumed: int, source: str) -> List[_Row]:
+        rows, lines, diagnostics = future.result()
+        # Workers may be other processes, so their parse counts are recorded here.
+        record_parsed(source, diagnostics, len(rows))
+        with self._lock:
+            self._progress.bytes_done += consumed
+            self._progress.chunks += 1
+            self._progress.lines += lines
+            self._progress.diagnostics += diagnostics
+            self._progress.entries += len(rows)
+        self._report(self.progress)
+        return rows
+
+    def _report(self, progress: ImportProgress) -> None:
+        emit("debug", "ImportProgress", progress.report())
+        if self._on_progress:
+            self._on_progress(progress)
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .log_store import LogStore, LogView
+from .log_types import LogEntry
+
+try:
+    import numpy as np  # type: ignore
+
+    HAS_NUMPY = True
+except Exception:  # pragma: no cover
+    HAS_NUMPY = False
+
+_NS_PER_S = 1_000_000_000
+
+
+def _lookup(codes: List[int]):
+    # 256-entry truth table: indexing it with a uint8 column is faster than np.isin.
+    table = np.zeros(256, dtype=bool)
+    table[codes] = True
+    return table
+
+
+class _Codebook:
+    """Maps level/source strings to small integer codes (uint8) and back."""
+
+    def __init__(self, initial: Sequence[str] = ()) -> None:
+        self._codes: Dict[str, int] = {}
+        self._names: List[str] = []
+        for name in initial:
+            self.code(name)
+
+    def code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            if len(self._names) >= 255:
+                # Out of codes: lump everything new under the last slot.
+                return 255
+            code = len(self._names)
+            self._codes[name] = code
+            self._names.append(name)
+        return code
+
+    def codes(self, names: Set[str]) -> List[int]:
+        return [self._codes[name] for name in names if name in self._codes]
+
+    def name(self, code: int) -> str:
+        return self._names[code] if code < len(self._names) else "other"
+
+
+class ColumnarHistory:
+    """
+    Ring of recent entries kept as NumPy columns: int64 ids and timestamps, uint8 level and
+    source codes, and messages as (offset, length) into a deduplicated UTF-8 arena.
+    Level/source/time filters become boolean masks and aggregates run vectorized.
+    Feed it with `attach(store)`; queries are safe from any thread.
+    """
+
+    def __init__(self, capacity: int = 100_000) -> None:
+        if not HAS_NUMPY:
+            raise RuntimeError("ColumnarHistory requires numpy")
+        self._capacity = max(1, capacity)
+        self._ids = np.zeros(self._capacity, dtype=np.int64)
+        self._ts = np.zeros(self._capacity, dtype=np.int64)
+        self._levels = np.zeros(self._capacity, dtype=np.uint8)
+        self._sources = np.zeros(self._capacity, dtype=np.uint8)
+        self._msg_off = np.zeros(self._capacity, dtype=np.int64)
+        self._msg_len = np.zeros(self._capacity, dtype=np.int32)
+        self._arena = bytearray()
+        self._arena_slots: Dict[str, Tuple[int, int]] = {}
+        self._level_book = _Codebook(("debug", "info", "warn", "error"))
+        self._source_book = _Codebook()
+        self._head = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def attach(self, store: LogStore):
+        """Backfill from `store` and follow its batches; returns the unsubscribe callable."""
+        self.extend(store.get_all())
+        return store.subscribe_batch(self._on_batch)
+
+    def extend(self, entries: Sequence[LogEntry]) -> None:
+        with self._lock:
+            for entry in entries:
+                slot = self._head
+                self._ids[slot] = entry.id
+                self._ts[slot] = entry.ts_ns
+                self._levels[slot] = self._level_book.code(entry.level)
+                self._sources[slot] = self._source_book.code(entry.source)
+                self._msg_off[slot], self._msg_len[slot] = self._store_message(entry.message)
+                self._head = (slot + 1) % self._capacity
+                self._size = min(self._size + 1, self._capacity)
+            if len(self._arena) > 64 * 1024 * 1024 and len(self._arena_slots) > 2 * self._size:
+                self._compact_arena()
+
+    def mask(
+        self,
+        levels: Optional[Set[str]] = None,
+        sources: Optional[Set[str]] = None,
+        since_ns: Optional[int] = None,
+        until_ns: Optional[int] = None,
+    ):
+        """Boolean mask over held rows, oldest first."""
+        with self._lock:
+            return self._mask_locked(levels, sources, since_ns, until_ns)
+
+    def ids(self, **filters) -> "np.ndarray":
+        """Entry ids of held rows matching the `mask` filters, oldest first."""
+        with self._lock:
+            return self._ordered(self._ids)[self._mask_locked(**filters)]
+
+    def match_ids(self, ids, **filters) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Positions in `ids` (any int64 buffer, e.g. `array("q")`) whose entries match the
+        `mask` filters, and positions of ids no longer held here, which the caller must
+        check itself.
+        """
+        ids = np.frombuffer(ids, dtype=np.int64)
+        with self._lock:
+            held = self._ordered(self._ids)
+            keep = self._mask_locked(**filters)
+        if not len(held):
+            return np.flatnonzero(np.zeros(len(ids), dtype=bool)), np.arange(len(ids))
+        # Ids are assigned in arrival order, so `held` is almost always already sorted.
+        if (held[1:] >= held[:-1]).all():
+            slots = np.searchsorted(held, ids).clip(max=len(held) - 1)
+        else:
+            order = np.argsort(held, kind="stable")
+            slots = order[np.searchsorted(held, ids, sorter=order).clip(max=len(held) - 1)]
+        covered = held[slots] == ids
+        return np.flatnonzero(covered & keep[slots]), np.flatnonzero(~covered)
+
+    def counts_per_level_per_second(self, **filters) -> Dict[str, Dict[int, int]]:
+        """{level: {epoch_second: count}} for rows matching the `mask` filters."""
+        with self._lock:
+            keep = self._mask_locked(**filters)
+            seconds = self._ordered(self._ts)[keep] // _NS_PER_S
+            levels = self._ordered(self._levels)[keep]
+            keys = seconds * 256 + levels
+            uniq, counts = np.unique(keys, return_counts=True)
+            out: Dict[str, Dict[int, int]] = {}
+            for key, count in zip(uniq.tolist(), counts.tolist()):
+                out.setdefault(self._level_book.name(key % 256), {})[key // 256] = count
+            return out
+
+    def level_counts(self, **filters) -> Dict[str, int]:
+        with self._lock:
+            levels = self._ordered(self._levels)[self._mask_locked(**filters)]
+            counts = np.bincount(levels, minlength=256)
+            return {self._level_book.name(code): int(n) for code, n in enumerate(counts) if n}
+
+    def top_messages(self, n: int = 10, **filters) -> List[Tuple[str, int]]:
+        """Most frequent messages; identical messages share one arena slot, so count by offset."""
+        with self._lock:
+            keep = self._mask_locked(**filters)
+            offsets = self._ordered(self._msg_off)[keep]
+            lengths = self._ordered(self._msg_len)[keep]
+            if not len(offsets):
+                return []
+            uniq, first, counts = np.unique(offsets, return_index=True, return_counts=True)
+            order = np.argsort(counts)[::-1][:n]
+            return [
+                (self._read_message(int(uniq[i]), int(lengths[first[i]])), int(counts[i]))
+                for i in order
+            ]
+
+    def _on_batch(self, entries: List[LogEntry], _history: LogView) -> None:
+        self.extend(entries)
+
+    def _mask_locked(self, levels=None, sources=None, since_ns=None, until_ns=None):
+        keep = np.ones(self._size, dtype=bool)
+        if levels is not None:
+            keep &= _lookup(self._level_book.codes(levels))[self._ordered(self._levels)]
+        if sources is not None:
+            keep &= _lookup(self._source_book.codes(sources))[self._ordered(self._sources)]
+        if since_ns is not None:
+            keep &= self._ordered(self._ts) >= since_ns
+        if until_ns is not None:
+            keep &= self._ordered(self._ts) <= until_ns
+        return keep
+
+    def _ordered(self, column):
+        if self._size < self._capacity:
+            return column[: self._size]
+        return np.concatenate((column[self._head :], column[: self._head]))
+
+    def _store_message(self, message: str) -> Tuple[int, int]:
+        slot = self._arena_slots.get(message)
+        if slot is None:
+            encoded = message.encode("utf-8")
+            slot = (len(self._arena), len(encoded))
+            self._arena += encoded
+            self._arena_slots[message] = slot
+        return slot
+
+    def _read_message(self, offset: int, length: int) -> str:
+        return self._arena[offset : offset + length].decode("utf-8", errors="replace")
+
+    def _compact_arena(self) -> None:
+        # Rebuild the arena from messages still referenced by held rows.
+        live = self._ordered(self._msg_off)
+        lengths = self._ordered(self._msg_len)
+        remap: Dict[int, int] = {}
+        arena = bytearray()
+        slots: Dict[str, Tuple[int, int]] = {}
+        for old, length in zip(live.tolist(), lengths.tolist()):
+            if old in remap:
+                continue
+            raw = bytes(self._arena[old : old + length])
+            remap[old] = len(arena)
+            slots[raw.decode("utf-8", errors="replace")] = (len(arena), length)
+            arena += raw
+        self._msg_off[:] = [remap.get(int(off), 0) for off in self._msg_off]
+        self._arena = arena
+        self._arena_slots = slots
@@ -1,19 +1,52 @@
 from __future__ import annotations
 
-from typing import Callable, Optional
+import os
+from typing import Callable, Dict, List, Optional, Tuple
 
+from .batching import EntryBatcher
+from .file_tail import FileTailSource, TailOffsets
+from .health import HealthMonitor
 from .log_store import LogStore
-from .metro_runner import MetroRunner
+from .logger import emit
+from .metro_runner import DEFAULT_METRO_PORT, MetroRunner, RestartPolicy
+from .sessions import SessionRegistry
+from .ws_limits import WsLimits
 from .ws_server import WebSocketIngestServer
 
 
+MetroKey = Tuple[str, int]
+
+
 class IngestController:
-    def __init__(self, store: LogStore, host: str = "127.0.0.1", port: int = 8765) -> None:
+    """
+    Owns the ingest sources: one WebSocket server, any number of Metro runners keyed
+    by (project directory, port) and any number of followed log files keyed by path.
+    Metro runners and file tails share one event loop and one `EntryBatcher`, so each
+    added source costs a coroutine rather than threads.
+    """
+
+    def __init__(
+        self,
+        store: LogStore,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        ws_limits: Optional[WsLimits] = None,
+        sessions: Optional[SessionRegistry] = None,
+        metro_restart: Optional[RestartPolicy] = RestartPolicy(),
+        tail_offsets: Optional[TailOffsets] = None,
+    ) -> None:
         self._store = store
+        self._sessions = sessions or SessionRegistry()
+        self._metro_restart = metro_restart
+        self._metro_pipeline = EntryBatcher(store, background=True)
         self._ws_host = host
         self._ws_port = port
+        self._ws_limits = ws_limits
         self._ws_server: Optional[WebSocketIngestServer] = None
-        self._metro: Optional[MetroRunner] = None
+        self._metro: Dict[MetroKey, MetroRunner] = {}
+        self._tail_offsets = tail_offsets
+        self._tails: Dict[str, FileTailSource] = {}
+        self._health = HealthMonitor()
 
         self._on_ws_status: Optional[Callable[[bool], None]] = None
         self._on_metro_status: Optional[Callable[[bool], None]] = None
@@ -39,6 +72,8 @@ class IngestController:
             host=self._ws_host,
             port=self._ws_port,
             on_state=self._handle_ws_state,
+            limits=self._ws_limits,
+            sessions=self._sessions,
         )
         self._ws_server.start()
 
@@ -47,30 +82,161 @@ class IngestController:
             return
         self._ws_server.stop()
 
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Stop every source and wait until what they ingested has reached the store, so
+        a journal can be closed afterwards without losing the final batches.
+        """
+        self.stop_ws()
+        self.stop_metro()
+        self.stop_tail()
+        waits = [self._ws_server.wait] if self._ws_server else []
+        waits += [runner.wait for runner in self._metro.values()]
+        for wait in waits:
+            try:
+                wait(timeout)
+            except Exception as exc:
+                emit("error", "SourceStopFailed", {"error": str(exc) or type(exc).__name__})
+        self._metro_pipeline.close()
+        self._health.stop()
+
     def ws_running(self) -> bool:
         return bool(self._ws_server and self._ws_server.is_running)
 
-    def start_metro(self, project_dir: str, command: Optional[list[str]] = None) -> None:
-        if self._metro and self._metro.is_running:
-            return
-        self._metro = MetroRunner(self._store, on_state=self._handle_metro_state)
-        if command:
-            self._metro.start_with_command(project_dir, command)
-        else:
-            self._metro.start(project_dir)
+    @property
+    def health(self) -> HealthMonitor:
+        """Cached port and Metro `/status` health; every started Metro's port is watched."""
+        return self._health
 
-    def stop_metro(self) -> None:
-        if not self._metro:
-            return
-        self._metro.stop()
+    @property
+    def sessions(self) -> SessionRegistry:
+        return self._sessions
 
-    def metro_running(self) -> bool:
-        return bool(self._metro and self._metro.is_running)
+    def ws_stats(self) -> Dict[str, int]:
+        if not self._ws_server:
+            return {"connections": 0, "queued": 0, "dropped": 0}
+        return self._ws_server.stats()
+
+    def start_metro(
+        self,
+        project_dir: str,
+        command: Optional[list[str]] = None,
+        port: Optional[int] = None,
+    ) -> MetroKey:
+        """Start Metro for `project_dir` on `port` (Expo's 8081 by default); no-op if already running."""
+        key = metro_key(project_dir, port)
+        runner = self._metro.get(key)
+        if runner and runner.is_running:
+            return key
+        command = list(command or ["npm", "run", "start"])
+        if port is not None and command[:2] == ["npm", "run"]:
+            command += ["--", "--port", str(port)]
+        runner = MetroRunner(
+            self._store,
+            on_state=self._handle_metro_state,
+            source=metro_source(key),
+            port=key[1],
+            batcher=self._metro_pipeline,
+            restart=self._metro_restart,
+            health=self._health,
+        )
+        self._metro[key] = runner
+        self._health.watch("127.0.0.1", key[1])
+        runner.start_with_command(project_dir, command)
+        return key
+
+    def stop_metro(self, project_dir: Optional[str] = None, port: Optional[int] = None) -> None:
+        """Stop one project's Metro, or every runner when no project is given."""
+        if project_dir is None:
+            runners = list(self._metro.values())
+        else:
+            runners = [r for r in (self._metro.get(metro_key(project_dir, port)),) if r]
+        for runner in runners:
+            runner.stop()
+        # Ports still served by another running project stay watched.
+        live = {key[1] for key, runner in self._metro.items() if runner.is_running}
+        for port in {runner.port for runner in runners} - live:
+            self._health.unwatch("127.0.0.1", port)
+
+    def metro_running(self, project_dir: Optional[str] = None, port: Optional[int] = None) -> bool:
+        if project_dir is None:
+            return any(r.is_running for r in self._metro.values())
+        runner = self._metro.get(metro_key(project_dir, port))
+        return bool(runner and runner.is_running)
+
+    def wait_metro(self) -> None:
+        """Block until every Metro runner (including restarts) has finished."""
+        for runner in list(self._metro.values()):
+            runner.wait()
+
+    def metro_status(self) -> List[Dict[str, object]]:
+        return [
+            {"project": project, **runner.status()} for (project, _port), runner in self._metro.items()
+        ]
+
+    def start_tail(self, path: str, from_end: bool = False) -> str:
+        """Follow the log file at `path`; no-op if it is already followed. Returns its key."""
+        key = os.path.abspath(path)
+        tail = self._tails.get(key)
+        if tail and tail.is_running:
+            return key
+        tail = FileTailSource(
+            self._store,
+            key,
+            batcher=self._metro_pipeline,
+            offsets=self._tail_offsets,
+            from_end=from_end,
+        )
+        self._tails[key] = tail
+        tail.start()
+        return key
+
+    def stop_tail(self, path: Optional[str] = None) -> None:
+        """Stop following one file, or every file when no path is given."""
+        if path is None:
+            tails = list(self._tails.values())
+        else:
+            tails = [t for t in (self._tails.get(os.path.abspath(path)),) if t]
+        for tail in tails:
+            tail.stop()
+        for tail in tails:
+            try:
+                tail.wait(timeout=5.0)
+            except Exception as exc:
+                # Also runs from Qt's aboutToQuit, which must not see exceptions.
+                emit("error", "FileTailStopFailed", {"path": tail.path, "error": str(exc) or type(exc).__name__})
+
+    def tail_running(self, path: Optional[str] = None) -> bool:
+        if path is None:
+            return any(t.is_running for t in self._tails.values())
+        tail = self._tails.get(os.path.abspath(path))
+        return bool(tail and tail.is_running)
+
+    def tail_status(self) -> List[Dict[str, object]]:
+        return [tail.status() for tail in self._tails.values()]
 
     def _handle_ws_state(self, running: bool) -> None:
         if self._on_ws_status:
             self._on_ws_status(running)
 
-    def _handle_metro_state(self, running: bool) -> None:
+    def _handle_metro_state(self, _running: bool) -> None:
         if self._on_metro_status:
-            self._on_metro_status(running)
+            self._on_metro_status(self.metro_running())
+
+
+def metro_key(project_dir: str, port: Optional[int] = None) -> MetroKey:
+    return os.path.abspath(project_dir), port or DEFAULT_METRO_PORT
+
+
+def metro_source(key: MetroKey) -> str:
+    """Source tag for a runner's entries: `metro:<project folder>:<port>`."""
+    project, port = key
+    return f"metro:{os.path.basename(project.rstrip(os.sep)) or project}:{port}"
+
+
+def parse_project_arg(value: str) -> Tuple[str, Optional[int]]:
+    """`DIR` or `DIR:PORT` from the command line."""
+    head, sep, tail = value.rpartition(":")
+    if sep and head and tail.isdigit():
+        return head, int(tail)
+    return value, None
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import argparse
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from .log_types import LogEntry
+
+DEFAULT_DEDUPE_WINDOW_S = 5.0
+DEFAULT_MAX_FINGERPRINTS = 4096
+# Nested data deeper than this is fingerprinted as an opaque dict/list.
+_SHAPE_DEPTH = 4
+
+
+@dataclass
+class RepeatInfo:
+    """How often the entry `entry_id` has repeated, and over which timestamps."""
+
+    entry_id: int
+    count: int
+    first_ns: int
+    last_ns: int
+
+    def to_dict(self) -> Dict[str, int]:
+        return {"count": self.count, "first_ns": self.first_ns, "last_ns": self.last_ns}
+
+
+def data_shape(value: Any, depth: int = 0) -> Any:
+    """
+    Hashable outline of `value`: dict keys and value types, but not the values, so
+    `{"attempt": 1}` and `{"attempt": 2}` share a shape.
+    """
+    if isinstance(value, dict):
+        if depth >= _SHAPE_DEPTH:
+            return dict
+        return tuple(sorted((str(key), data_shape(item, depth + 1)) for key, item in value.items()))
+    if isinstance(value, list):
+        if depth >= _SHAPE_DEPTH or not value:
+            return list
+        return (list, data_shape(value[0], depth + 1))
+    return type(value)
+
+
+def fingerprint(entry: LogEntry) -> int:
+    return hash((entry.level, entry.message, entry.source, data_shape(entry.data) if entry.data else None))
+
+
+class Deduplicator:
+    """
+    Collapses repeated entries. Entries with the same fingerprint (level, message, source
+    and data shape) arriving within `window_s` of the previous copy are dropped; the
+    first copy is kept and its `RepeatInfo` counts the repeats. Because the window
+    slides, a render loop that never pauses stays collapsed into one entry. At most
+    `max_fingerprints` recent fingerprints and repeat records are kept (least recently
+    seen first out), so memory stays fixed.
+    """
+
+    def __init__(
+        self, window_s: float = DEFAULT_DEDUPE_WINDOW_S, max_fingerprints: int = DEFAULT_MAX_FINGERPRINTS
+    ) -> None:
+        self._window_ns = int(window_s * 1_000_000_000)
+        self._max = max(1, max_fingerprints)
+        self._recent: "OrderedDict[int, RepeatInfo]" = OrderedDict()
+        self._repeats: "OrderedDict[int, RepeatInfo]" = OrderedDict()
+        self._changed: "OrderedDict[int, RepeatInfo]" = OrderedDict()
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def suppressed(self) -> int:
+        """Entries dropped as repeats so far."""
+        return self._suppressed
+
+    def filter(self, entries: Sequence[LogEntry]) -> List[LogEntry]:
+        """The entries of `entries` that are not repeats, in order."""
+        kept: List[LogEntry] = []
+        window = self._window_ns
+        recent, repeats = self._recent, self._repeats
+        with self._lock:
+            for entry in entries:
+                key = fingerprint(entry)
+                info = recent.get(key)
+                if info is not None and abs(entry.ts_ns - info.last_ns) <= window:
+                    info.count += 1
+                    info.first_ns = min(info.first_ns, entry.ts_ns)
+                    info.last_ns = max(info.last_ns, entry.ts_ns)
+                    recent.move_to_end(key)
+                    repeats[info.entry_id] = info
+                    repeats.move_to_end(info.entry_id)
+                    self._changed[info.entry_id] = info
+                    self._suppressed += 1
+                    continue
+                recent[key] = RepeatInfo(entry.id, 1, entry.ts_ns, entry.ts_ns)
+                recent.move_to_end(key)
+                kept.append(entry)
+            while len(recent) > self._max:
+                recent.popitem(last=False)
+            while len(repeats) > self._max:
+                repeats.popitem(last=False)
+            while len(self._changed) > self._max:
+                self._changed.popitem(last=False)
+        return kept
+
+    def repeat_info(self, entry_id: int) -> Optional[RepeatInfo]:
+        """Repeat record of a kept entry, or None if it has not repeated (or was forgotten)."""
+        with self._lock:
+            return self._repeats.get(entry_id)
+
+    def take_changed(self) -> Dict[int, RepeatInfo]:
+        """Repeat records updated since the last call, keyed by entry id."""
+        with self._lock:
+            changed, self._changed = self._changed, OrderedDict()
+        return dict(changed)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"suppressed": self._suppressed, "fingerprints": len(self._recent), "repeating": len(self._repeats)}
+
+
+def add_dedupe_arguments(parser: argparse.ArgumentParser, default_window_s: float) -> None:
+    parser.add_argument(
+        "--dedupe-window",
+        type=float,
+        default=default_window_s,
+        help="Collapse identical entries repeated within this many seconds into one (0 = off)",
+    )
+
+
+def deduplicator_from_args(args: argparse.Namespace) -> Optional[Deduplicator]:
+    return Deduplicator(args.dedupe_window) if args.dedupe_window > 0 else None
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .log_types import LogEntry
+from .logger import emit
+from .metrics import NS, REGISTRY
+
+SUBSCRIBER_OVERFLOW_POLICIES = ("drop-oldest", "drop-newest", "block")
+# Most entries handed to one subscriber call.
+DELIVER_BATCH = 4096
+
+# (entries, history view) -> None; the view type lives in log_store.
+BatchCallback = Callable[[List[LogEntry], Any], None]
+
+
+@dataclass(frozen=True)
+class DispatchPolicy:
+    """
+    Queued delivery for a store subscriber: at most `max_queued` entries wait, and
+    `overflow` picks what happens when the queue is full: drop the oldest waiting
+    entries, drop the new ones, or make the producer wait ("block").
+    """
+
+    max_queued: int = 10_000
+    overflow: str = "drop-oldest"
+
+    def __post_init__(self) -> None:
+        if self.overflow not in SUBSCRIBER_OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(SUBSCRIBER_OVERFLOW_POLICIES)}")
+        if self.max_queued < 1:
+            raise ValueError("max_queued must be at least 1")
+
+
+class QueuedSubscriber:
+    """
+    One subscriber's bounded queue and worker thread. `push` is all the producer pays
+    for; the worker hands queued entries to `deliver` in batches of up to `DELIVER_BATCH`
+    together with the newest history view. Tracks lag (entries waiting and the age of
+    the oldest) and drops.
+    """
+
+    def __init__(self, name: str, deliver: BatchCallback, policy: DispatchPolicy) -> None:
+        self.name = name
+        self._deliver = deliver
+        self._policy = policy
+        self._batches: Deque[Tuple[float, List[LogEntry]]] = deque()
+        self._queued = 0
+        self._view: Any = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._busy = False
+        self._delivered = 0
+        self._dropped = 0
+        self._max_lag_s = 0.0
+        self._lag = REGISTRY.histogram(
+            "ase_subscriber_lag_seconds", "Age of the oldest entry handed to a subscriber", scale=NS, subscriber=name
+        )
+        self._latency = REGISTRY.histogram(
+            "ase_subscriber_deliver_seconds", "Time a queued subscriber spent per delivery", scale=NS, subscriber=name
+        )
+        self._dropped_total = REGISTRY.counter(
+            "ase_subscriber_dropped_total", "Entries dropped from a full subscriber queue", subscriber=name
+        )
+        REGISTRY.gauge("ase_subscriber_queued", "Entries waiting in a subscriber queue", subscriber=name).set_function(
+            lambda: self._queued
+        )
+        self._thread = threading.Thread(target=self._run, name=f"ase-sub-{name}", daemon=True)
+        self._thread.start()
+
+    def push(self, batch: List[LogEntry], view: Any) -> None:
+        policy = self._policy
+        with self._cond:
+            if self._closed:
+                return
+            if policy.overflow == "block":
+                while self._queued + len(batch) > policy.max_queued and self._queued and not self._closed:
+                    self._cond.wait()
+            elif policy.overflow == "drop-newest":
+                room = max(0, policy.max_queued - self._queued)
+                if room < len(batch):
+                    self._dropped += len(batch) - room
+                    self._dropped_total.inc(len(batch) - room)
+                    batch = batch[:room]
+            if batch:
+                self._batches.append((time.monotonic(), batch))
+                self._queued += len(batch)
+            if policy.overflow == "drop-oldest":
+                self._trim_oldest_locked()
+            self._view = view
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            oldest = self._batches[0][0] if self._batches else None
+            return {
+                "subscriber": self.name,
+                "queued": self._queued,
+                "lag_s": round(time.monotonic() - oldest, 4) if oldest is not None else 0.0,
+                "max_lag_s": round(self._max_lag_s, 4),
+                "delivered": self._delivered,
+                "dropped": self._dropped,
+            }
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued has been delivered; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queued or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _trim_oldest_locked(self) -> None:
+        excess = self._queued - self._policy.max_queued
+        while excess > 0 and self._batches:
+            enqueued_at, oldest = self._batches[0]
+            if len(oldest) <= excess:
+                self._batches.popleft()
+                removed = len(oldest)
+            else:
+                self._batches[0] = (enqueued_at, oldest[excess:])
+                removed = excess
+            self._queued -= removed
+            self._dropped += removed
+            self._dropped_total.inc(removed)
+            excess -= removed
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._batches and not self._closed:
+                    self._cond.wait()
+                if not self._batches:
+                    return
+                batch: List[LogEntry] = []
+                oldest = self._batches[0][0]
+                while self._batches and len(batch) + len(self._batches[0][1]) <= DELIVER_BATCH:
+                    batch.extend(self._batches.popleft()[1])
+                if not batch:
+                    enqueued_at, first = self._batches[0]
+                    batch, self._batches[0] = first[:DELIVER_BATCH], (enqueued_at, first[DELIVER_BATCH:])
+                self._queued -= len(batch)
+                lag = time.monotonic() - oldest
+                self._max_lag_s = max(self._max_lag_s, lag)
+                self._lag.record(int(lag * 1e9))
+                view = self._view
+                self._busy = True
+                # Producers blocked on a full queue can continue now.
+                self._cond.notify_all()
+            started = time.perf_counter_ns()
+            try:
+                self._deliver(batch, view)
+            except Exception as exc:
+                emit("error", "SubscriberFailed", {"subscriber": self.name, "error": str(exc)})
+            self._latency.record(time.perf_counter_ns() - started)
+            with self._cond:
+                self._busy = False
+                self._delivered += len(batch)
+                self._cond.notify_all()
+
+
+def subscriber_name(subscriber: Callable) -> str:
+    return getattr(subscriber, "__qualname__", None) or type(subscriber).__name__
+
+
+def add_dispatch_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--subscriber-queue",
+        type=int,
+        default=0,
+        help="Give each log subscriber its own queue of this many entries and a worker thread (0 = call inline)",
+    )
+    parser.add_argument(
+        "--subscriber-overflow",
+        choices=SUBSCRIBER_OVERFLOW_POLICIES,
+        default="drop-oldest",
+        help="What a full subscriber queue does with new entries",
+    )
+
+
+def dispatch_from_args(args: argparse.Namespace) -> Optional[DispatchPolicy]:
+    if args.subscriber_queue <= 0:
+        return None
+    return DispatchPolicy(max_queued=args.subscriber_queue, overflow=args.subscriber_overflow)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Coroutine, Optional
+
+
+class EventLoopThread:
+    """
+    One asyncio event loop running on a daemon thread. The WebSocket server and every
+    Metro runner schedule their coroutines here, so I/O for any number of sources
+    shares one thread instead of one thread each.
+    """
+
+    def __init__(self, name: str = "ase-event-loop") -> None:
+        self._name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                ready = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(ready,), name=self._name, daemon=True)
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        """Schedule `coro` on the loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, callback: Callable[..., Any], *args: Any) -> None:
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=2.0)
+
+    def _run(self, ready: threading.Event) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        ready.set()
+        self._loop.run_forever()
+
+
+_shared: Optional[EventLoopThread] = None
+_shared_lock = threading.Lock()
+
+
+def shared_loop() -> EventLoopThread:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = EventLoopThread()
+        return _shared
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import ctypes
+import ctypes.util
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import BinaryIO, Callable, Dict, Optional, Tuple
+
+from .batching import EntryBatcher
+from .event_loop import EventLoopThread, shared_loop
+from .ingest import iter_diagnostics_lines, iter_log_entries_bytes
+from .log_store import LogStore
+from .logger import emit
+from .metro_runner import MAX_LINE_BYTES, READ_CHUNK_BYTES
+
+# Without change notifications the file is checked this often; with them, this is only a
+# safety net for events that never arrive (network filesystems, watch overflow).
+POLL_INTERVAL_S = 0.5
+NOTIFY_FALLBACK_S = 5.0
+OFFSET_SAVE_INTERVAL_S = 1.0
+DEFAULT_TAIL_STATE = os.path.join(os.path.expanduser("~"), ".all_seeing_eye", "tail_offsets.json")
+
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def add_tail_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--tail", action="append", metavar="FILE", help="Follow a log file (repeat for several files)"
+    )
+    parser.add_argument(
+        "--tail-from-end", action="store_true", help="Start new --tail files at their end instead of the start"
+    )
+    parser.add_argument(
+        "--tail-state",
+        default=DEFAULT_TAIL_STATE,
+        help="Where --tail byte offsets are saved so a restart resumes ('' = don't save)",
+    )
+
+
+class _Inotify:
+    """
+    inotify watch on a file's directory (so rotations are seen as well as writes),
+    called through ctypes. `open` returns None where inotify is unavailable.
+    """
+
+    def __init__(self, fd: int, name: bytes, on_change: Callable[[], None]) -> None:
+        self.fd = fd
+        self._name = name
+        self._on_change = on_change
+
+    @classmethod
+    def open(cls, path: str, on_change: Callable[[], None]) -> Optional["_Inotify"]:
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        directory, name = os.path.split(path)
+        if libc.inotify_add_watch(fd, os.fsencode(directory or "."), _WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return cls(fd, os.fsencode(name), on_change)
+
+    def on_readable(self) -> None:
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        pos = 0
+        while pos + _EVENT_HEADER.size <= len(data):
+            _wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, pos)
+            name = data[pos + _EVENT_HEADER.size : pos + _EVENT_HEADER.size + length].rstrip(b"\0")
+            pos += _EVENT_HEADER.size + length
+            if name == self._name or mask & _IN_Q_OVERFLOW:
+                self._on_change()
+                return
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class TailOffsets:
+    """
+    Byte offsets of followed files, persisted as JSON (`{path: {dev, ino, offset}}`) so a
+    restarted tail resumes where it stopped. Writes go to a temporary file first.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                self._offsets: Dict[str, Dict[str, int]] = json.load(handle)
+        except (OSError, ValueError):
+            self._offsets = {}
+
+    def get(self, path: str, dev: int, ino: int) -> Optional[int]:
+        with self._lock:
+            saved = self._offsets.get(path)
+        if saved and saved.get("dev") == dev and saved.get("ino") == ino:
+            return int(saved.get("offset", 0))
+        return None
+
+    def set(self, path: str, dev: int, ino: int, offset: int) -> None:
+        with self._lock:
+            self._offsets[path] = {"dev": dev, "ino": ino, "offset": offset}
+            payload = json.dumps(self._offsets)
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = f"{self._path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as handle:
+                handle.write(payload)
+            os.replace(tmp, self._path)
+
+
+class FileTailSource:
+    """
+    Follow a log file (e.g. an `adb logcat` dump or a simulator log) and ingest its
+    `[Diagnostics]` lines. Like `MetroRunner`, it is a coroutine on the shared event loop
+    and may share a `batcher`; reads are `READ_CHUNK_BYTES` chunks done on a worker
+    thread. The loop sleeps until inotify reports a change (polling where inotify is
+    unavailable). A file that shrinks is re-read from the start; when the path is
+    replaced (rotation), the old file is read to its end before the new one is opened.
+    With `offsets`, the position is saved and a restart resumes from it; otherwise a new
+    file is read from the start, or from its end with `from_end`.
+    """
+
+    def __init__(
+        self,
+        store: LogStore,
+        path: str,
+        source: Optional[str] = None,
+        loop: Optional[EventLoopThread] = None,
+        batcher: Optional[EntryBatcher] = None,
+        offsets: Optional[TailOffsets] = None,
+        from_end: bool = False,
+        on_state: Optional[Callable[[bool], None]] = None,
+    ) -> None:
+        self._store = store
+        self._path = os.path.abspath(path)
+        self._source = source or f"file:{os.path.basename(self._path)}"
+        self._loop = loop or shared_loop()
+        self._batcher = batcher
+        self._offsets = offsets
+        self._from_end = from_end
+        self._on_state = on_state
+        self._future: Optional[Future] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._file: Optional[BinaryIO] = None
+        self._identity: Tuple[int, int] = (0, 0)
+        self._position = 0
+        self._partial = b""
+        self._opened = False
+        self._saved_offset = -1
+        self._last_save = 0.0
+        self._running = False
+        self._stopping = False
+        self._notify = "poll"
+        self._entries = 0
+        self._rotations = 0
+        self._truncations = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def source(self) -> str:
+        return self._source
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "path": self._path,
+            "source": self._source,
+            "running": self._running,
+            "offset": self._offset,
+            "entries": self._entries,
+            "rotations": self._rotations,
+            "truncations": self._truncations,
+            "notify": self._notify,
+        }
+
+    def start(self) -> None:
+        if self._future and not self._future.done():
+            return
+        emit("info", "FileTailStart", {"path": self._path, "source": self._source})
+        self._stopping = False
+        self._future = self._loop.submit(self._follow())
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._loop.call_soon(self._wakeup)
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        if self._future:
+            self._future.result(timeout)
+
+    @property
+    def _offset(self) -> int:
+        """End of the last complete line read: where a restart resumes."""
+        return self._position - len(self._partial)
+
+    def _wakeup(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _follow(self) -> None:
+        loop = asyncio.get_running_loop()
+        batcher = self._batcher or EntryBatcher(self._store)
+        self._wake = asyncio.Event()
+        watcher = _Inotify.open(self._path, self._wakeup)
+        if watcher is not None:
+            loop.add_reader(watcher.fd, watcher.on_readable)
+            self._notify = "inotify"
+        interval = NOTIFY_FALLBACK_S if watcher is not None else POLL_INTERVAL_S
+        self._set_running(True)
+        try:
+            while not self._stopping:
+                self._wake.clear()
+                await loop.run_in_executor(None, self._drain, batcher)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+        except Exception as exc:
+            emit("error", "FileTailFailed", {"path": self._path, "error": str(exc)})
+        finally:
+            if watcher is not None:
+                loop.remove_reader(watcher.fd)
+                watcher.close()
+            # The offset marks entries as consumed, so it is only saved once they are stored.
+            try:
+                if batcher is self._batcher:
+                    batcher.flush()
+                else:
+                    batcher.close()
+            except Exception as exc:
+                emit("error", "FileTailFlushFailed", {"path": self._path, "error": str(exc)})
+            else:
+                self._save_offset(force=True)
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._set_running(False)
+            emit("info", "FileTailStopped", self.status())
+
+    def _drain(self, batcher: EntryBatcher) -> None:
+        """Worker thread: ingest everything new, following truncation and rotation."""
+        if self._file is None and not self._open(first=not self._opened):
+            return
+        if os.fstat(self._file.fileno()).st_size < self._position:
+            emit("warn", "FileTailTruncated", {"path": self._path, "offset": self._position})
+            self._truncations += 1
+            self._file.seek(0)
+            self._position = 0
+            self._partial = b""
+        self._read_to_end(batcher)
+        try:
+            current = os.stat(self._path)
+        except FileNotFoundError:
+            return  # Rotated away and not yet recreated: keep the old file until it is.
+        if (current.st_dev, current.st_ino) != self._identity:
+            # The old file is complete: its last line needs no trailing newline.
+            self._read_to_end(batcher, final=True)
+            self._file.close()
+            self._file = None
+            self._rotations += 1
+            emit("info", "FileTailRotated", {"path": self._path, "rotations": self._rotations})
+            if self._open(first=False):
+                self._read_to_end(batcher)
+        self._save_offset()
+
+    def _open(self, first: bool) -> bool:
+        try:
+            handle = open(self._path, "rb", buffering=0)
+        except OSError:
+            return False
+        info = os.fstat(handle.fileno())
+        self._identity = (info.st_dev, info.st_ino)
+        start = 0
+        saved = self._offsets.get(self._path, *self._identity) if self._offsets and first else None
+        if saved is not None and saved <= info.st_size:
+            start = saved
+            emit("info", "FileTailResume", {"path": self._path, "offset": saved})
+        elif first and self._from_end:
+            start = info.st_size
+        handle.seek(start)
+        self._opened = True
+        self._file = handle
+        self._position = start
+        self._partial = b""
+        return True
+
+    def _read_to_end(self, batcher: EntryBatcher, final: bool = False) -> None:
+        while not self._stopping:
+            chunk = self._file.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            self._position += len(chunk)
+            data = self._partial + chunk if self._partial else chunk
+            cut = data.rfind(b"\n") + 1
+            block, self._partial = data[:cut], data[cut:]
+            if len(self._partial) > MAX_LINE_BYTES:
+                self._partial = b""
+            self._ingest(block, batcher)
+        if final and self._partial:
+            block, self._partial = self._partial, b""
+            self._ingest(block, batcher)
+
+    def _ingest(self, block: bytes, batcher: EntryBatcher) -> None:
+        entries = list(iter_log_entries_bytes(iter_diagnostics_lines(block), source=self._source))
+        if entries:
+            batcher.add_many(entries)
+            self._entries += len(entries)
+
+    def _save_offset(self, force: bool = False) -> None:
+        if self._offsets is None or self._file is None or self._offset == self._saved_offset:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_save < OFFSET_SAVE_INTERVAL_S:
+            return
+        try:
+            self._offsets.set(self._path, *self._identity, self._offset)
+        except OSError as exc:
+            emit("warn", "FileTailOffsetSaveFailed", {"path": self._path, "error": str(exc)})
+            return
+        self._saved_offset = self._offset
+        self._last_save = now
+
+    def _set_running(self, value: bool) -> None:
+        self._running = value
+        if self._on_state:
+            self._on_state(value)
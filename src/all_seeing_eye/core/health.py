@@ -1,8 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 import socket
+import threading
+import time
+from concurrent.futures import Future
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .event_loop import EventLoopThread, shared_loop
+from .logger import emit
+
+HEALTH_POLL_INTERVAL_S = 1.0
+HEALTH_PROBE_TIMEOUT_S = 0.5
+# Metro answers GET /status with this body once the bundler is ready.
+METRO_STATUS_RUNNING = "packager-status:running"
+
+HealthKey = Tuple[str, int]
 
 
 @dataclass(frozen=True)
@@ -11,6 +25,14 @@ class PortHealth:
     port: int
     listening: bool
     error: Optional[str] = None
+    # Body of Metro's /status endpoint when it was checked and answered.
+    status: Optional[str] = None
+    latency_ms: Optional[float] = None
+    checked_at: float = 0.0
+
+    @property
+    def metro_running(self) -> bool:
+        return self.status == METRO_STATUS_RUNNING
 
 
 def check_tcp_listener(host: str, port: int, timeout_s: float = 0.25) -> PortHealth:
@@ -18,7 +40,129 @@ def check_tcp_listener(host: str, port: int, timeout_s: float = 0.25) -> PortHea
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             s.settimeout(timeout_s)
             result = s.connect_ex((host, port))
-            return PortHealth(host=host, port=port, listening=(result == 0), error=None)
+            return PortHealth(host=host, port=port, listening=(result == 0), error=None, checked_at=time.time())
     except Exception as exc:
-        return PortHealth(host=host, port=port, listening=False, error=str(exc))
+        return PortHealth(host=host, port=port, listening=False, error=str(exc), checked_at=time.time())
+
+
+async def probe_port(
+    host: str, port: int, timeout_s: float = HEALTH_PROBE_TIMEOUT_S, http_status: bool = False
+) -> PortHealth:
+    """Async TCP probe; with `http_status`, also fetch Metro's `/status` over the same connection."""
+    started = time.monotonic()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout_s)
+    except (OSError, asyncio.TimeoutError) as exc:
+        return PortHealth(host, port, False, error=str(exc) or type(exc).__name__, checked_at=time.time())
+    latency_ms = (time.monotonic() - started) * 1000
+    status = None
+    try:
+        if http_status:
+            writer.write(f"GET /status HTTP/1.0\r\nHost: {host}:{port}\r\n\r\n".encode("ascii"))
+            response = await asyncio.wait_for(reader.read(4096), timeout_s)
+            _head, _sep, body = response.partition(b"\r\n\r\n")
+            status = body.strip().decode("utf-8", "replace")[:200] or None
+    except (OSError, asyncio.TimeoutError):
+        pass
+    finally:
+        writer.close()
+    return PortHealth(host, port, True, status=status, latency_ms=latency_ms, checked_at=time.time())
+
+
+class HealthMonitor:
+    """
+    Background health checks for any number of (host, port) targets. Every
+    `interval_s` all targets are probed concurrently on the shared event loop (a TCP
+    connect plus, for Metro targets, `GET /status`) and the results are cached with
+    their timestamps. Readers such as the UI only call `get`/`snapshot` and never wait
+    on the network; `on_change` and the `HealthChanged` log line fire only when a
+    target's listening or status state changes.
+    """
+
+    def __init__(
+        self,
+        loop: Optional[EventLoopThread] = None,
+        interval_s: float = HEALTH_POLL_INTERVAL_S,
+        timeout_s: float = HEALTH_PROBE_TIMEOUT_S,
+        on_change: Optional[Callable[[PortHealth], None]] = None,
+    ) -> None:
+        self._loop = loop or shared_loop()
+        self._interval_s = interval_s
+        self._timeout_s = timeout_s
+        self._on_change = on_change
+        self._targets: Dict[HealthKey, bool] = {}
+        self._cache: Dict[HealthKey, PortHealth] = {}
+        self._lock = threading.Lock()
+        self._future: Optional[Future] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def set_change_callback(self, callback: Callable[[PortHealth], None]) -> None:
+        self._on_change = callback
+
+    def watch(self, host: str, port: int, http_status: bool = True) -> None:
+        """Start probing `host:port` (starting the monitor if needed) and probe right away."""
+        with self._lock:
+            self._targets[(host, port)] = http_status
+        if self._future is None or self._future.done():
+            self._future = self._loop.submit(self._run())
+        else:
+            self.refresh()
+
+    def unwatch(self, host: str, port: int) -> None:
+        with self._lock:
+            self._targets.pop((host, port), None)
+            self._cache.pop((host, port), None)
+
+    def refresh(self) -> None:
+        """Probe every target now instead of at the next interval."""
+        self._loop.call_soon(self._wakeup)
+
+    def get(self, host: str, port: int) -> Optional[PortHealth]:
+        with self._lock:
+            return self._cache.get((host, port))
+
+    def snapshot(self) -> List[PortHealth]:
+        with self._lock:
+            return list(self._cache.values())
+
+    def stop(self) -> None:
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+
+    def _wakeup(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        self._wake = asyncio.Event()
+        while True:
+            self._wake.clear()
+            with self._lock:
+                targets = list(self._targets.items())
+            results = await asyncio.gather(
+                *(probe_port(host, port, self._timeout_s, http_status) for (host, port), http_status in targets)
+            )
+            for result in results:
+                self._record(result)
+            try:
+                await asyncio.wait_for(self._wake.wait(), self._interval_s)
+            except asyncio.TimeoutError:
+                pass
 
+    def _record(self, result: PortHealth) -> None:
+        key = (result.host, result.port)
+        with self._lock:
+            if key not in self._targets:
+                return
+            previous = self._cache.get(key)
+            self._cache[key] = result
+        if previous is not None and (previous.listening, previous.status) == (result.listening, result.status):
+            return
+        emit(
+            "info",
+            "HealthChanged",
+            {"host": result.host, "port": result.port, "listening": result.listening, "status": result.status},
+        )
+        if self._on_change:
+            self._on_change(result)
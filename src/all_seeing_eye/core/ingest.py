@@ -1,14 +1,68 @@
 from __future__ import annotations
 
 import json
-import uuid
+import time
+import zlib
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
-from .log_types import LogEntry
+from .log_types import LogEntry, datetime_to_ns, new_entry
+from .metrics import REGISTRY, source_kind
+
+try:
+    import orjson  # type: ignore
+
+    HAS_ORJSON = True
+except Exception:  # pragma: no cover
+    HAS_ORJSON = False
+
+try:
+    import msgspec  # type: ignore
+
+    HAS_MSGSPEC = True
+except Exception:  # pragma: no cover
+    HAS_MSGSPEC = False
+
+try:
+    import msgpack  # type: ignore
+
+    HAS_MSGPACK = True
+except Exception:  # pragma: no cover
+    HAS_MSGPACK = False
 
 
 DIAGNOSTICS_PREFIX = "[Diagnostics] "
+DIAGNOSTICS_PREFIX_BYTES = DIAGNOSTICS_PREFIX.encode("ascii")
+# Compressed frames may not expand past this; larger payloads are dropped.
+MAX_DECOMPRESSED_BYTES = 64 * 1024 * 1024
+
+_GZIP_MAGIC = b"\x1f\x8b"
+# First byte of a MessagePack map or array (fixmap, fixarray, array16/32, map16/32).
+_MSGPACK_CONTAINER_BYTES = frozenset(range(0x80, 0xA0)) | {0xDC, 0xDD, 0xDE, 0xDF}
+
+if HAS_ORJSON:
+    JSON_BACKEND = "orjson"
+    _loads = orjson.loads
+    _DECODE_ERRORS: tuple = (orjson.JSONDecodeError,)
+elif HAS_MSGSPEC:
+    JSON_BACKEND = "msgspec"
+    _loads = msgspec.json.Decoder().decode
+    _DECODE_ERRORS = (msgspec.DecodeError,)
+else:
+    JSON_BACKEND = "json"
+    _loads = json.loads
+    _DECODE_ERRORS = (json.JSONDecodeError, UnicodeDecodeError)
+
+if HAS_MSGSPEC:
+
+    class _DiagnosticsPayload(msgspec.Struct):
+        ts: Any = None
+        timestamp: Any = None
+        level: Any = "info"
+        message: Any = ""
+        data: Any = None
+
+    _decode_payload = msgspec.json.Decoder(_DiagnosticsPayload).decode
 
 
 def parse_diagnostics_line(line: str) -> Optional[Dict[str, Any]]:
@@ -17,26 +71,199 @@ def parse_diagnostics_line(line: str) -> Optional[Dict[str, Any]]:
         return None
     payload = line[idx + len(DIAGNOSTICS_PREFIX) :].strip()
     try:
-        return json.loads(payload)
-    except json.JSONDecodeError:
+        return _loads(payload)
+    except _DECODE_ERRORS:
         return None
 
 
-def to_log_entry(payload: Dict[str, Any], source: str) -> LogEntry:
-    timestamp = payload.get("ts") or payload.get("timestamp")
-    if isinstance(timestamp, str):
+def parse_diagnostics_bytes(line: bytes) -> Optional[Dict[str, Any]]:
+    """Byte-level variant of `parse_diagnostics_line`; skips decoding lines without the prefix."""
+    idx = line.find(DIAGNOSTICS_PREFIX_BYTES)
+    if idx == -1:
+        return None
+    payload = line[idx + len(DIAGNOSTICS_PREFIX_BYTES) :].strip()
+    if not payload.startswith(b"{"):
+        return None
+    try:
+        return _loads(payload)
+    except _DECODE_ERRORS:
+        return None
+
+
+def parse_entry_bytes(line: bytes, source: str) -> Optional[LogEntry]:
+    """Raw Metro output line straight to a `LogEntry`, or None for non-diagnostics lines."""
+    idx = line.find(DIAGNOSTICS_PREFIX_BYTES)
+    if idx == -1:
+        return None
+    return _entry_from_json_bytes(line[idx + len(DIAGNOSTICS_PREFIX_BYTES) :], source)
+
+
+def _entry_from_json_bytes(raw: bytes, source: str) -> Optional[LogEntry]:
+    raw = raw.strip()
+    if not raw.startswith(b"{"):
+        return None
+    if not HAS_MSGSPEC:
+        try:
+            return to_log_entry(_loads(raw), source=source)
+        except _DECODE_ERRORS:
+            return None
+    # msgspec decodes straight into a typed struct, skipping the intermediate dict.
+    try:
+        payload = _decode_payload(raw)
+    except msgspec.DecodeError:
+        return None
+    return new_entry(
+        ts_ns=parse_timestamp_ns(payload.ts or payload.timestamp),
+        level=str(payload.level),
+        message=str(payload.message),
+        data=payload.data if isinstance(payload.data, dict) else None,
+        source=source,
+    )
+
+
+_last_timestamp: tuple = (None, 0)
+
+
+def parse_timestamp_ns(value: Any) -> int:
+    """
+    ISO-8601 timestamp to UTC epoch nanoseconds, falling back to now. `fromisoformat`
+    accepts a trailing "Z" natively; the last parsed value is cached because bursts from
+    one device often share a millisecond timestamp.
+    """
+    global _last_timestamp
+    if not isinstance(value, str) or not value:
+        return time.time_ns()
+    last_value, last_ns = _last_timestamp
+    if value == last_value:
+        return last_ns
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
         try:
-            dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+            # Python < 3.11 rejects the "Z" suffix.
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
         except ValueError:
-            dt = datetime.utcnow()
-    else:
-        dt = datetime.utcnow()
+            return time.time_ns()
+    ts_ns = datetime_to_ns(dt)
+    _last_timestamp = (value, ts_ns)
+    return ts_ns
 
-    return LogEntry(
-        id=str(uuid.uuid4()),
-        timestamp=dt,
+
+def to_log_entry(payload: Dict[str, Any], source: str) -> LogEntry:
+    data = payload.get("data")
+    return new_entry(
+        ts_ns=parse_timestamp_ns(payload.get("ts") or payload.get("timestamp")),
         level=str(payload.get("level", "info")),
         message=str(payload.get("message", "")),
-        data=payload.get("data") if isinstance(payload.get("data"), dict) else None,
+        data=data if isinstance(data, dict) else None,
         source=source,
     )
+
+
+def iter_log_entries(lines: Iterable[str], source: str) -> Iterator[LogEntry]:
+    for line in lines:
+        payload = parse_diagnostics_line(line)
+        if not payload:
+            continue
+        yield to_log_entry(payload, source=source)
+
+
+def iter_diagnostics_lines(block: bytes) -> Iterator[bytes]:
+    """
+    Lines of a newline-terminated `block` that contain the diagnostics prefix. The block is
+    searched for the prefix directly, so noise lines are never split out or copied.
+    """
+    prefix = DIAGNOSTICS_PREFIX_BYTES
+    pos = block.find(prefix)
+    while pos != -1:
+        start = block.rfind(b"\n", 0, pos) + 1
+        end = block.find(b"\n", pos)
+        if end == -1:
+            end = len(block)
+        yield block[start:end]
+        pos = block.find(prefix, end)
+
+
+def iter_log_entries_bytes(lines: Iterable[bytes], source: str) -> Iterator[LogEntry]:
+    prefix = DIAGNOSTICS_PREFIX_BYTES
+    skip = len(prefix)
+    seen = parsed = 0
+    try:
+        for line in lines:
+            # Most Metro output is bundler noise: reject it with one byte scan, no decoding.
+            idx = line.find(prefix)
+            if idx == -1:
+                continue
+            seen += 1
+            entry = _entry_from_json_bytes(line[idx + skip :], source)
+            if entry is not None:
+                parsed += 1
+                yield entry
+    finally:
+        if seen:
+            record_parsed(source, seen, parsed)
+
+
+def record_parsed(source: str, lines: int, entries: int) -> None:
+    """Count `lines` diagnostics lines from `source`, of which `entries` parsed, into the metrics."""
+    kind = source_kind(source)
+    REGISTRY.counter("ase_ingest_lines_total", "Diagnostics lines seen", source=kind).inc(lines)
+    REGISTRY.counter("ase_ingest_entries_total", "Entries parsed", source=kind).inc(entries)
+    REGISTRY.counter("ase_ingest_parse_failures_total", "Lines that failed to parse", source=kind).inc(lines - entries)
+
+
+def parse_frame(message: str | bytes, source: str) -> List[LogEntry]:
+    """
+    Entries from one WebSocket frame: a JSON object, a JSON array of objects, NDJSON, or
+    `[Diagnostics]`-prefixed lines. Binary frames may also be gzip/zlib-compressed, and
+    MessagePack (an object or array of objects) is accepted when `msgpack` is installed.
+    """
+    if isinstance(message, str):
+        raw = message.encode("utf-8")
+    else:
+        raw = _decompress(message)
+        if raw is None:
+            return []
+        if HAS_MSGPACK and raw[:1] and raw[0] in _MSGPACK_CONTAINER_BYTES:
+            try:
+                payload = msgpack.unpackb(raw, raw=False, strict_map_key=False)
+            except (ValueError, TypeError, msgpack.UnpackException):
+                return []
+            return _entries_from_payload(payload, source)
+    raw = raw.strip()
+    if raw.startswith((b"{", b"[")):
+        try:
+            return _entries_from_payload(_loads(raw), source)
+        except _DECODE_ERRORS:
+            pass  # NDJSON: several objects, one per line.
+    entries = []
+    for line in raw.splitlines():
+        line = line.strip()
+        entry = _entry_from_json_bytes(line, source) if line.startswith(b"{") else parse_entry_bytes(line, source)
+        if entry is not None:
+            entries.append(entry)
+    return entries
+
+
+def _decompress(raw: bytes) -> Optional[bytes]:
+    if not (raw.startswith(_GZIP_MAGIC) or _is_zlib_header(raw)):
+        return raw
+    # wbits 32+15 accepts both gzip and zlib headers.
+    inflater = zlib.decompressobj(32 + zlib.MAX_WBITS)
+    try:
+        out = inflater.decompress(raw, MAX_DECOMPRESSED_BYTES)
+    except zlib.error:
+        return None
+    return None if inflater.unconsumed_tail else out
+
+
+def _is_zlib_header(raw: bytes) -> bool:
+    return len(raw) >= 2 and raw[0] & 0x0F == 8 and (raw[0] << 8 | raw[1]) % 31 == 0
+
+
+def _entries_from_payload(payload: Any, source: str) -> List[LogEntry]:
+    if isinstance(payload, dict):
+        return [to_log_entry(payload, source=source)]
+    if isinstance(payload, list):
+        return [to_log_entry(item, source=source) for item in payload if isinstance(item, dict)]
+    return []
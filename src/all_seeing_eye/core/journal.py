@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import json
+import os
+import struct
+import threading
+import time
+from bisect import bisect_right
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .log_types import LogEntry, entry_from_dict, entry_to_dict
+from .logger import emit
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+INDEX_SUFFIX = ".idx"
+OFFSETS_SUFFIX = ".off"
+
+# Sparse time index record: (entry epoch nanoseconds, byte offset of the entry's line).
+_INDEX_RECORD = struct.Struct("<qQ")
+# Dense offset index: one little-endian uint64 line offset per entry, for random access.
+OFFSET_RECORD = struct.Struct("<Q")
+_TAIL_BLOCK_BYTES = 64 * 1024
+
+JournalRecord = Tuple[int, bytes]
+
+
+class LogJournal:
+    """
+    Append-only on-disk journal of log entries.
+    Entries are JSONL lines in numbered segment files that rotate at `segment_bytes`.
+    Each segment has a sparse `.idx` time index with one record per `index_interval_bytes`
+    and a dense `.off` offset index used by `JournalReader` for random access.
+    Writes are flushed to the OS on every batch; fsync runs at most every `fsync_interval_s`.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 64 * 1024 * 1024,
+        fsync_interval_s: float = 1.0,
+        index_interval_bytes: int = 64 * 1024,
+    ) -> None:
+        self._directory = directory
+        self._segment_bytes = segment_bytes
+        self._fsync_interval_s = fsync_interval_s
+        self._index_interval_bytes = index_interval_bytes
+        self._lock = threading.Lock()
+        self._file: Optional[BinaryIO] = None
+        self._index_file: Optional[BinaryIO] = None
+        self._offsets_file: Optional[BinaryIO] = None
+        self._segment_no = 0
+        self._size = 0
+        self._last_indexed: Optional[int] = None
+        self._last_sync = time.monotonic()
+        self._dirty = False
+
+        os.makedirs(directory, exist_ok=True)
+        segments = self.segments()
+        if segments:
+            self._segment_no = _segment_number(segments[-1])
+        self._open_segment()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def segments(self) -> List[str]:
+        return list_segments(self._directory)
+
+    @staticmethod
+    def encode(entries: Sequence[LogEntry]) -> List[JournalRecord]:
+        return [
+            (
+                entry.ts_ns,
+                json.dumps(entry_to_dict(entry), default=str).encode("utf-8") + b"\n",
+            )
+            for entry in entries
+        ]
+
+    def append(self, entries: Sequence[LogEntry]) -> None:
+        self.write(self.encode(entries))
+
+    @property
+    def lock(self) -> threading.Lock:
+        """
+        Held for the duration of a write. Callers that order writes under their own lock
+        take this one before releasing theirs, then call `write_locked` outside it.
+        """
+        return self._lock
+
+    def write(self, records: Sequence[JournalRecord]) -> None:
+        if not records:
+            return
+        with self._lock:
+            self.write_locked(records)
+
+    def write_locked(self, records: Sequence[JournalRecord]) -> None:
+        """`write` for a caller that already holds `lock`."""
+        if self._file is None:
+            raise RuntimeError("LogJournal is closed")
+        offsets = bytearray()
+        for epoch_ns, line in records:
+            if self._size >= self._segment_bytes:
+                self._offsets_file.write(offsets)
+                offsets = bytearray()
+                self._rotate()
+            since_indexed = self._size - (self._last_indexed or 0)
+            if self._last_indexed is None or since_indexed >= self._index_interval_bytes:
+                self._index_file.write(_INDEX_RECORD.pack(epoch_ns, self._size))
+                self._last_indexed = self._size
+            offsets += OFFSET_RECORD.pack(self._size)
+            self._file.write(line)
+            self._size += len(line)
+        self._file.flush()
+        # Offsets go out after the lines they point at so readers never see a dangling row.
+        self._offsets_file.write(offsets)
+        self._offsets_file.flush()
+        self._index_file.flush()
+        self._dirty = True
+        if time.monotonic() - self._last_sync >= self._fsync_interval_s:
+            self._sync()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None and self._dirty:
+                self._sync()
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._index_file.close()
+                self._offsets_file.close()
+            self._file = None
+            self._index_file = None
+            self._offsets_file = None
+
+    def tail(self, count: int) -> List[LogEntry]:
+        """The newest `count` entries, read backwards from the end of the newest segments."""
+        if count <= 0:
+            return []
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            segments = self.segments()
+        lines: List[bytes] = []
+        for path in reversed(segments):
+            lines[:0] = _read_last_lines(path, count - len(lines))
+            if len(lines) >= count:
+                break
+        return list(_decode_lines(lines))
+
+    def iter_since(self, since_epoch: float) -> Iterator[LogEntry]:
+        """
+        Entries at or after `since_epoch`, seeking each segment with its sparse time index.
+        Timestamps come from devices and are only approximately ordered, so the index
+        picks a starting point and entries are still filtered individually.
+        """
+        since_ns = int(since_epoch * 1_000_000_000)
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            segments = self.segments()
+        indexes = [_read_index(path) for path in segments]
+        for pos, (path, index) in enumerate(zip(segments, indexes)):
+            following = next((idx for idx in indexes[pos + 1 :] if idx), None)
+            if following and following[0][0] <= since_ns:
+                continue
+            offset = 0
+            if index:
+                at = bisect_right([ts for ts, _ in index], since_ns) - 1
+                offset = index[at][1] if at >= 0 else 0
+            with open(path, "rb") as fh:
+                fh.seek(offset)
+                for entry in _decode_lines(fh):
+                    if entry.ts_ns >= since_ns:
+                        yield entry
+
+    def _open_segment(self) -> None:
+        path = self._segment_path(self._segment_no)
+        self._file = open(path, "ab")
+        self._index_file = open(sidecar_path(path, INDEX_SUFFIX), "ab")
+        self._offsets_file = open(sidecar_path(path, OFFSETS_SUFFIX), "ab")
+        self._size = self._file.tell()
+        self._last_indexed = None
+        if self._size and not _ends_with_newline(path):
+            # Terminate a line torn by a crash so the next entry starts cleanly.
+            self._file.write(b"\n")
+            self._size += 1
+
+    def _rotate(self) -> None:
+        self._sync()
+        self._file.close()
+        self._index_file.close()
+        self._offsets_file.close()
+        self._segment_no += 1
+        self._open_segment()
+        emit("info", "JournalRotated", {"segment": self._segment_path(self._segment_no)})
+
+    def _sync(self) -> None:
+        for fh in (self._file, self._index_file, self._offsets_file):
+            fh.flush()
+        os.fsync(self._file.fileno())
+        os.fsync(self._index_file.fileno())
+        os.fsync(self._offsets_file.fileno())
+        self._last_sync = time.monotonic()
+        self._dirty = False
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self._directory, f"{SEGMENT_PREFIX}{number:08d}{SEGMENT_SUFFIX}")
+
+
+def sidecar_path(segment_path: str, suffix: str) -> str:
+    return segment_path[: -len(SEGMENT_SUFFIX)] + suffix
+
+
+def list_segments(directory: str) -> List[str]:
+    names = [
+        name
+        for name in os.listdir(directory)
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+    ]
+    return [os.path.join(directory, name) for name in sorted(names)]
+
+
+def _segment_number(path: str) -> int:
+    name = os.path.basename(path)
+    return int(name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)])
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as fh:
+        fh.seek(-1, os.SEEK_END)
+        return fh.read(1) == b"\n"
+
+
+def _read_index(path: str) -> List[Tuple[int, int]]:
+    try:
+        with open(sidecar_path(path, INDEX_SUFFIX), "rb") as fh:
+            raw = fh.read()
+    except FileNotFoundError:
+        return []
+    usable = len(raw) - len(raw) % _INDEX_RECORD.size
+    return list(_INDEX_RECORD.iter_unpack(raw[:usable]))
+
+
+def _read_last_lines(path: str, count: int) -> List[bytes]:
+    if count <= 0:
+        return []
+    with open(path, "rb") as fh:
+        fh.seek(0, os.SEEK_END)
+        pos = fh.tell()
+        chunks: List[bytes] = []
+        newlines = 0
+        # One extra newline guarantees the first kept line is complete.
+        while pos > 0 and newlines <= count:
+            step = min(_TAIL_BLOCK_BYTES, pos)
+            pos -= step
+            fh.seek(pos)
+            chunk = fh.read(step)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+    lines = b"".join(reversed(chunks)).split(b"\n")
+    if pos > 0:
+        lines = lines[1:]
+    return [line for line in lines if line.strip()][-count:]
+
+
+def decode_line(line: bytes) -> Optional[LogEntry]:
+    try:
+        return entry_from_dict(json.loads(line))
+    except (ValueError, KeyError, TypeError):
+        # Torn writes from a crash leave a partial line; skip it.
+        return None
+
+
+def _decode_lines(lines: Iterable[bytes]) -> Iterator[LogEntry]:
+    for line in lines:
+        entry = decode_line(line)
+        if entry is not None:
+            yield entry
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import mmap
+import os
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import List, Optional
+
+from .journal import OFFSET_RECORD, OFFSETS_SUFFIX, decode_line, list_segments, sidecar_path
+from .log_types import LogEntry
+
+
+class _MappedSegment:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._data: Optional[mmap.mmap] = None
+        self._offsets: Optional[mmap.mmap] = None
+        # Fallback for segments written before `.off` files existed.
+        self._scanned: Optional[array] = None
+        self.rows = 0
+        self.remap()
+
+    def remap(self) -> None:
+        self.close()
+        self.rows = 0
+        # Map offsets before data: the writer appends lines before their offsets, so every
+        # mapped offset points inside the data mapped afterwards.
+        offsets_size = self._offsets_size()
+        if offsets_size >= OFFSET_RECORD.size:
+            with open(sidecar_path(self.path, OFFSETS_SUFFIX), "rb") as fh:
+                self._offsets = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, "rb") as fh:
+            self._data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._offsets is not None:
+            self.rows = len(self._offsets) // OFFSET_RECORD.size
+        else:
+            self._scanned = self._scan_offsets()
+            self.rows = len(self._scanned)
+
+    def line(self, row: int) -> bytes:
+        if self._scanned is not None:
+            start = self._scanned[row]
+        else:
+            (start,) = OFFSET_RECORD.unpack_from(self._offsets, row * OFFSET_RECORD.size)
+        end = self._data.find(b"\n", start)
+        return self._data[start : end if end != -1 else len(self._data)]
+
+    def size_changed(self) -> bool:
+        mapped_data = len(self._data) if self._data is not None else 0
+        mapped_offsets = len(self._offsets) if self._offsets is not None else 0
+        return (
+            os.path.getsize(self.path) != mapped_data
+            or self._offsets_size() != mapped_offsets
+        )
+
+    def close(self) -> None:
+        for mapped in (self._data, self._offsets):
+            if mapped is not None:
+                mapped.close()
+        self._data = None
+        self._offsets = None
+        self._scanned = None
+
+    def _offsets_size(self) -> int:
+        path = sidecar_path(self.path, OFFSETS_SUFFIX)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def _scan_offsets(self) -> array:
+        offsets = array("Q")
+        pos = 0
+        size = len(self._data)
+        while pos < size:
+            offsets.append(pos)
+            end = self._data.find(b"\n", pos)
+            if end == -1:
+                break
+            pos = end + 1
+        return offsets
+
+
+class JournalReader:
+    """
+    Random access to journaled entries by row number.
+    Segments and their dense offset indexes are memory-mapped, so the OS pages data in
+    and out on demand; only the `cache_rows` most recently decoded entries stay resident.
+    """
+
+    def __init__(self, directory: str, cache_rows: int = 2048) -> None:
+        self._directory = directory
+        self._cache_rows = cache_rows
+        self._cache: OrderedDict[int, Optional[LogEntry]] = OrderedDict()
+        self._segments: List[_MappedSegment] = []
+        self._starts: List[int] = []
+        self._rows = 0
+        self.refresh()
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def refresh(self) -> int:
+        """Pick up rows and segments appended since the last call; returns the row count."""
+        known = {segment.path for segment in self._segments}
+        if self._segments and self._segments[-1].size_changed():
+            self._segments[-1].remap()
+        for path in list_segments(self._directory):
+            if path not in known:
+                self._segments.append(_MappedSegment(path))
+        self._starts = []
+        total = 0
+        for segment in self._segments:
+            self._starts.append(total)
+            total += segment.rows
+        self._rows = total
+        return total
+
+    def entry(self, row: int) -> Optional[LogEntry]:
+        """Decoded entry at `row`, or None for a line that can't be decoded (e.g. torn by a crash)."""
+        if row in self._cache:
+            self._cache.move_to_end(row)
+            return self._cache[row]
+        if not 0 <= row < self._rows:
+            raise IndexError("journal row out of range")
+        pos = bisect_right(self._starts, row) - 1
+        segment = self._segments[pos]
+        entry = decode_line(segment.line(row - self._starts[pos]))
+        self._cache[row] = entry
+        if len(self._cache) > self._cache_rows:
+            self._cache.popitem(last=False)
+        return entry
+
+    def close(self) -> None:
+        for segment in self._segments:
+            segment.close()
+        self._segments = []
+        self._starts = []
+        self._rows = 0
+        self._cache.clear()
@@ -1,42 +1,287 @@
 from __future__ import annotations
 
 import threading
-from typing import Callable, List
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, overload
 
-from .log_types import LogEntry
+from .dedupe import Deduplicator
+from .dispatch import DispatchPolicy, QueuedSubscriber, subscriber_name
+from .journal import LogJournal
+from .log_types import LogEntry, reserve_entry_ids
+from .metrics import NS, REGISTRY
+from .search import LogIndex, LogQuery
 
-LogSubscriber = Callable[[LogEntry, List[LogEntry]], None]
+_Slot = Optional[Tuple[int, LogEntry]]
+
+
+class LogView(Sequence[LogEntry]):
+    """
+    Read-only window over the store's ring buffer, bounded by sequence numbers.
+    Taking a view copies nothing; entries are read from the ring on access.
+    Entries overwritten after the view was taken are skipped when iterating.
+    """
+
+    def __init__(self, ring: List[_Slot], start_seq: int, end_seq: int) -> None:
+        self._ring = ring
+        self._start_seq = start_seq
+        self._end_seq = end_seq
+
+    @property
+    def start_seq(self) -> int:
+        return self._start_seq
+
+    @property
+    def end_seq(self) -> int:
+        """Sequence number one past the newest entry; use as the next `get_since` cursor."""
+        return self._end_seq
+
+    def __len__(self) -> int:
+        return self._end_seq - self._start_seq
+
+    @overload
+    def __getitem__(self, index: int) -> LogEntry: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[LogEntry]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("LogView index out of range")
+        entry = self._read(self._start_seq + index)
+        if entry is None:
+            raise IndexError("entry was evicted from the ring buffer")
+        return entry
+
+    def __iter__(self) -> Iterator[LogEntry]:
+        for seq in range(self._start_seq, self._end_seq):
+            entry = self._read(seq)
+            if entry is not None:
+                yield entry
+
+    def _read(self, seq: int) -> Optional[LogEntry]:
+        slot = self._ring[seq % len(self._ring)]
+        if slot is None or slot[0] != seq:
+            return None
+        return slot[1]
+
+
+LogSubscriber = Callable[[LogEntry, LogView], None]
+LogBatchSubscriber = Callable[[List[LogEntry], LogView], None]
+# A registered subscriber and, when it is dispatched through a queue, that queue.
+_Registration = Tuple[Callable, Optional[QueuedSubscriber]]
 
 
 class LogStore:
-    def __init__(self, max_history: int = 1000) -> None:
-        self._max_history = max_history
-        self._history: List[LogEntry] = []
-        self._subscribers: List[LogSubscriber] = []
+    """
+    Fixed-capacity ring buffer of log entries with monotonic sequence numbers.
+    Subscribers receive the new entry plus a `LogView` of the history instead of a copy;
+    batch subscribers receive every entry of an `add_many` call in one callback. With a
+    `dedupe` stage, repeats are dropped before they are stored, journaled or delivered.
+    Subscribers run inline in `add_many` unless given a `DispatchPolicy` (per subscription
+    or as the store's `dispatch` default); then each gets its own bounded queue and worker
+    thread, and the producer only pays for the enqueue. `name` labels the store's metrics.
+    """
+
+    def __init__(
+        self,
+        max_history: int = 1000,
+        index: Optional[LogIndex] = None,
+        journal: Optional[LogJournal] = None,
+        dedupe: Optional[Deduplicator] = None,
+        dispatch: Optional[DispatchPolicy] = None,
+        name: str = "main",
+    ) -> None:
+        self._max_history = max(1, max_history)
+        self._index = index
+        self._journal = journal
+        self._dedupe = dedupe
+        self._dispatch = dispatch
+        self._ring: List[_Slot] = [None] * self._max_history
+        self._next_seq = 0
+        self._subscribers: List[_Registration] = []
+        self._batch_subscribers: List[_Registration] = []
         self._lock = threading.Lock()
+        self._added = REGISTRY.counter("ase_store_entries_total", "Entries appended to a store", store=name)
+        self._suppressed = REGISTRY.counter(
+            "ase_store_deduped_total", "Entries dropped as repeats before storing", store=name
+        )
+        self._batch_size = REGISTRY.histogram("ase_store_batch_entries", "Entries per add_many call", store=name)
+        self._lock_wait = REGISTRY.histogram(
+            "ase_store_lock_wait_seconds", "Time add_many waited for the store lock", scale=NS, store=name
+        )
+        self._dispatch_time = REGISTRY.histogram(
+            "ase_store_dispatch_seconds", "Time add_many spent handing entries to subscribers", scale=NS, store=name
+        )
+
+    @property
+    def max_history(self) -> int:
+        return self._max_history
 
-    def add(self, entry: LogEntry) -> None:
+    @property
+    def dedupe(self) -> Optional[Deduplicator]:
+        return self._dedupe
+
+    @property
+    def next_seq(self) -> int:
         with self._lock:
-            self._history.append(entry)
-            if len(self._history) > self._max_history:
-                self._history.pop(0)
-            snapshot = list(self._history)
+            return self._next_seq
+
+    def add(self, entry: LogEntry) -> int:
+        return self.add_many([entry])
+
+    def add_many(self, entries: Sequence[LogEntry]) -> int:
+        """Append `entries` under a single lock acquire; returns the sequence number of the first one."""
+        batch = self._dedupe.filter(entries) if self._dedupe is not None else list(entries)
+        if len(batch) != len(entries):
+            self._suppressed.inc(len(entries) - len(batch))
+        records = self._journal.encode(batch) if self._journal is not None else None
+        waiting = time.perf_counter_ns()
+        with self._lock:
+            self._lock_wait.record(time.perf_counter_ns() - waiting)
+            first_seq = self._append_locked(batch)
+            if records:
+                # Taken before the store lock is released so journal order matches
+                # sequence order, but the disk write itself doesn't block readers.
+                self._journal.lock.acquire()
+            view = self._view_locked(0)
             subscribers = list(self._subscribers)
+            batch_subscribers = list(self._batch_subscribers)
+        if records:
+            try:
+                self._journal.write_locked(records)
+            finally:
+                self._journal.lock.release()
 
-        for subscriber in subscribers:
-            subscriber(entry, snapshot)
+        if not batch:
+            return first_seq
+        self._added.inc(len(batch))
+        self._batch_size.record(len(batch))
+        started = time.perf_counter_ns()
+        for subscriber, queue in subscribers:
+            if queue is not None:
+                queue.push(batch, view)
+                continue
+            for entry in batch:
+                subscriber(entry, view)
+        for batch_subscriber, queue in batch_subscribers:
+            if queue is not None:
+                queue.push(batch, view)
+            else:
+                batch_subscriber(batch, view)
+        self._dispatch_time.record(time.perf_counter_ns() - started)
+        return first_seq
+
+    def restore(self, entries: Sequence[LogEntry]) -> None:
+        """Load previously journaled entries without writing them back or notifying subscribers."""
+        batch = list(entries)
+        reserve_entry_ids(batch)
+        with self._lock:
+            self._append_locked(batch)
+
+    def view(self) -> LogView:
+        with self._lock:
+            return self._view_locked(0)
 
     def get_all(self) -> List[LogEntry]:
+        return list(self.view())
+
+    def get_since(self, seq: int) -> LogView:
+        """Entries with a sequence number >= `seq` that are still held in the ring."""
+        with self._lock:
+            return self._view_locked(seq)
+
+    def search(self, query: LogQuery | str) -> List[int]:
+        """Sorted sequence numbers of held entries matching `query`; requires an index."""
+        if self._index is None:
+            raise RuntimeError("LogStore was created without a search index")
+        with self._lock:
+            return self._index.search(query)
+
+    def get_seqs(self, seqs: Sequence[int]) -> List[LogEntry]:
         with self._lock:
-            return list(self._history)
+            view = self._view_locked(0)
+        entries = []
+        for seq in seqs:
+            entry = view._read(seq) if view.start_seq <= seq < view.end_seq else None
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def subscribe(self, subscriber: LogSubscriber, dispatch: Optional[DispatchPolicy] = None) -> Callable[[], None]:
+        """Call `subscriber` per new entry; `dispatch` overrides the store's default policy."""
+        queue = self._make_queue(subscriber, dispatch, per_entry=True)
+        return self._register(self._subscribers, (subscriber, queue))
+
+    def subscribe_batch(
+        self, subscriber: LogBatchSubscriber, dispatch: Optional[DispatchPolicy] = None
+    ) -> Callable[[], None]:
+        queue = self._make_queue(subscriber, dispatch, per_entry=False)
+        return self._register(self._batch_subscribers, (subscriber, queue))
 
-    def subscribe(self, subscriber: LogSubscriber) -> Callable[[], None]:
+    def subscriber_stats(self) -> List[Dict[str, object]]:
+        """Lag and drop counters of every queued subscriber."""
         with self._lock:
-            self._subscribers.append(subscriber)
+            queues = [queue for _, queue in self._subscribers + self._batch_subscribers if queue is not None]
+        return [queue.stats() for queue in queues]
+
+    def drain_subscribers(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued subscribers have caught up; False if `timeout` ran out first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            queues = [queue for _, queue in self._subscribers + self._batch_subscribers if queue is not None]
+        for queue in queues:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not queue.drain(remaining):
+                return False
+        return True
+
+    def _make_queue(
+        self, subscriber, dispatch: Optional[DispatchPolicy], per_entry: bool
+    ) -> Optional[QueuedSubscriber]:
+        policy = dispatch or self._dispatch
+        if policy is None:
+            return None
+        if per_entry:
+
+            def deliver(batch: List[LogEntry], view: LogView) -> None:
+                for entry in batch:
+                    subscriber(entry, view)
+
+        else:
+            deliver = subscriber
+        return QueuedSubscriber(subscriber_name(subscriber), deliver, policy)
+
+    def _register(self, registry: List[_Registration], registration: _Registration) -> Callable[[], None]:
+        with self._lock:
+            registry.append(registration)
 
         def unsubscribe() -> None:
             with self._lock:
-                if subscriber in self._subscribers:
-                    self._subscribers.remove(subscriber)
+                if registration in registry:
+                    registry.remove(registration)
+            if registration[1] is not None:
+                registration[1].close()
 
         return unsubscribe
+
+    def _append_locked(self, batch: List[LogEntry]) -> int:
+        first_seq = self._next_seq
+        for seq, entry in enumerate(batch, first_seq):
+            slot = seq % self._max_history
+            if self._index is not None:
+                evicted = self._ring[slot]
+                if evicted is not None:
+                    self._index.remove(*evicted)
+                self._index.add(seq, entry)
+            self._ring[slot] = (seq, entry)
+        self._next_seq = first_seq + len(batch)
+        return first_seq
+
+    def _view_locked(self, since_seq: int) -> LogView:
+        oldest = max(0, self._next_seq - self._max_history)
+        start = min(max(oldest, since_seq), self._next_seq)
+        return LogView(self._ring, start, self._next_seq)
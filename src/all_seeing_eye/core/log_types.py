@@ -1,15 +1,93 @@
 from __future__ import annotations
 
+import itertools
+import sys
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Dict, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NS_PER_US = 1_000
 
-@dataclass(frozen=True)
+_entry_ids = itertools.count(1)
+
+
+@dataclass(frozen=True, slots=True)
 class LogEntry:
-    id: str
-    timestamp: datetime
+    """
+    One ingested log line. Ids come from a process-wide monotonic counter and timestamps
+    are UTC epoch nanoseconds; `timestamp` builds a datetime only when something displays it.
+    """
+
+    id: int
+    ts_ns: int
     level: str
     message: str
     data: Optional[Dict[str, Any]] = None
     source: str = "metro"
+
+    @property
+    def timestamp(self) -> datetime:
+        return _EPOCH + timedelta(microseconds=self.ts_ns // _NS_PER_US)
+
+
+def new_entry(
+    ts_ns: int,
+    level: str,
+    message: str,
+    data: Optional[Dict[str, Any]] = None,
+    source: str = "metro",
+) -> LogEntry:
+    # Levels and sources repeat on every entry; interning makes each instance share one string.
+    return LogEntry(
+        id=next(_entry_ids),
+        ts_ns=ts_ns,
+        level=sys.intern(level),
+        message=message,
+        data=data,
+        source=sys.intern(source),
+    )
+
+
+def reserve_entry_ids(entries: Iterable[LogEntry]) -> None:
+    """Advance the id counter past `entries` (e.g. replayed from a journal) to keep ids unique."""
+    global _entry_ids
+    highest = max((entry.id for entry in entries), default=0)
+    current = next(_entry_ids)
+    _entry_ids = itertools.count(max(current, highest + 1))
+
+
+def datetime_to_ns(dt: datetime) -> int:
+    """Epoch nanoseconds for `dt`; naive datetimes are treated as UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // timedelta(microseconds=1) * _NS_PER_US
+
+
+def entry_to_dict(entry: LogEntry) -> Dict[str, Any]:
+    return {
+        "id": entry.id,
+        "timestamp": entry.timestamp.isoformat(),
+        "level": entry.level,
+        "message": entry.message,
+        "source": entry.source,
+        "data": entry.data,
+    }
+
+
+def entry_from_dict(payload: Dict[str, Any]) -> LogEntry:
+    entry_id = payload["id"]
+    return LogEntry(
+        # Journals written before ids were integers carry UUID strings; give those fresh ids.
+        id=entry_id if isinstance(entry_id, int) else next(_entry_ids),
+        ts_ns=datetime_to_ns(datetime.fromisoformat(payload["timestamp"])),
+        level=sys.intern(payload["level"]),
+        message=payload["message"],
+        data=payload.get("data"),
+        source=sys.intern(payload.get("source", "metro")),
+    )
+
+
+def entry_epoch(entry: LogEntry) -> float:
+    """Entry timestamp as epoch seconds."""
+    return entry.ts_ns / 1_000_000_000
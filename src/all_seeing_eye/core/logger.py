@@ -1,17 +1,132 @@
 from __future__ import annotations
 
+import atexit
 import json
+import os
 import sys
-from datetime import datetime
-from typing import Any, Dict
-
-
-def emit(level: str, message: str, data: Dict[str, Any] | None = None) -> None:
-    payload = {
-        "ts": datetime.utcnow().isoformat() + "Z",
-        "level": level,
-        "message": message,
-        "data": data or {},
-    }
-    sys.stdout.write(f"[AllSeeingEye] {json.dumps(payload, default=str)}\n")
-    sys.stdout.flush()
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Tuple
+
+LEVELS = {"debug": 10, "info": 20, "warn": 30, "error": 40}
+LOG_LEVEL_ENV = "ALL_SEEING_EYE_LOG_LEVEL"
+MAX_QUEUED_RECORDS = 10_000
+
+_Record = Tuple[float, str, str, Dict[str, Any] | None]
+
+
+def _level_number(level: str) -> int:
+    return LEVELS.get(level.lower(), LEVELS["info"])
+
+
+_min_level = _level_number(os.environ.get(LOG_LEVEL_ENV, "info"))
+
+
+class _Writer:
+    """
+    Background writer for `emit`. Records are queued as raw tuples and serialized on the
+    writer thread, which writes everything pending and flushes once per wakeup.
+    When the queue is full, new records are dropped and counted (or the caller waits, with
+    `block=True`); the count is reported in a `LoggerDropped` line once the writer catches up.
+    """
+
+    def __init__(self, max_queued: int = MAX_QUEUED_RECORDS) -> None:
+        self._max_queued = max_queued
+        self._queue: Deque[_Record] = deque()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._pending_writes = 0
+        self._dropped = 0
+        self._dropped_total = 0
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped_total
+
+    def put(self, record: _Record, block: bool = False) -> None:
+        with self._cond:
+            while block and len(self._queue) >= self._max_queued:
+                self._cond.wait()
+            if len(self._queue) >= self._max_queued:
+                self._dropped += 1
+                self._dropped_total += 1
+                return
+            self._queue.append(record)
+            self._pending_writes += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ase-logger", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def flush(self, timeout: float = 2.0) -> None:
+        """Wait until every queued record has been written."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending_writes and self._thread is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                self._cond.wait(remaining)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                records: List[_Record] = list(self._queue)
+                self._queue.clear()
+                dropped, self._dropped = self._dropped, 0
+            if dropped:
+                records.append((time.time(), "warn", "LoggerDropped", {"records": dropped}))
+            try:
+                stream = sys.stdout
+                stream.write("".join(_format(record) for record in records))
+                stream.flush()
+            except (OSError, ValueError):
+                # stdout closed or a broken pipe: nothing useful left to do with the lines.
+                pass
+            with self._cond:
+                self._pending_writes -= len(records) - (1 if dropped else 0)
+                self._cond.notify_all()
+
+
+def _format(record: _Record) -> str:
+    ts, level, message, data = record
+    stamp = datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+    payload = {"ts": stamp, "level": level, "message": message, "data": data or {}}
+    return f"[AllSeeingEye] {json.dumps(payload, default=str)}\n"
+
+
+_writer = _Writer()
+atexit.register(_writer.flush)
+
+
+def set_level(level: str) -> None:
+    """Minimum level written by `emit`; lower levels are discarded before any formatting."""
+    global _min_level
+    _min_level = _level_number(level)
+
+
+def is_enabled(level: str) -> bool:
+    return LEVELS.get(level, LEVELS["info"]) >= _min_level
+
+
+def emit(level: str, message: str, data: Dict[str, Any] | None = None, block: bool = False) -> None:
+    """
+    Queue one log line for the background writer. Levels below the threshold return before
+    anything is formatted. `block=True` waits for queue space instead of dropping, for lines
+    that are the program's actual output (e.g. headless results).
+    """
+    if LEVELS.get(level, LEVELS["info"]) < _min_level:
+        return
+    _writer.put((time.time(), level, message, data), block)
+
+
+def flush() -> None:
+    _writer.flush()
+
+
+def dropped_count() -> int:
+    return _writer.dropped
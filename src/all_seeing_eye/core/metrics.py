@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .event_loop import EventLoopThread, shared_loop
+from .logger import emit
+
+# Histogram precision: values keep their top SUB_BITS bits, so a bucket is at most
+# 1/2**(SUB_BITS-1) (~6 %) wide relative to its values.
+SUB_BITS = 5
+_HALF = 1 << (SUB_BITS - 1)
+# Enough buckets for any 64-bit value.
+_BUCKETS = (64 - SUB_BITS + 2) * _HALF
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+NS = 1e-9
+
+# Recording takes no lock: a lock costs more than the update itself, and under the GIL
+# an update is only lost if a thread switch lands mid-increment, which is acceptable
+# for telemetry. Reads copy what they need.
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """Monotonic count, e.g. entries ingested."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: _Labels = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._value = 0
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def inc(self, amount: int = 1) -> None:
+        self._value += amount
+
+    def samples(self) -> List[Tuple[str, _Labels, float]]:
+        return [(self.name, self.labels, self._value)]
+
+
+class Gauge:
+    """
+    Current value, e.g. a queue depth. Either set/inc/dec it, or give it a function that
+    is read when metrics are collected, which costs the hot path nothing.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: _Labels = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._value = 0.0
+        self._fn: Optional[Callable[[], float]] = None
+
+    @property
+    def value(self) -> float:
+        fn = self._fn
+        if fn is None:
+            return self._value
+        try:
+            return float(fn())
+        except Exception:
+            return float("nan")
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+    def set_function(self, fn: Optional[Callable[[], float]]) -> None:
+        self._fn = fn
+
+    def samples(self) -> List[Tuple[str, _Labels, float]]:
+        return [(self.name, self.labels, self.value)]
+
+
+class Histogram:
+    """
+    HDR-style histogram of non-negative integers (nanoseconds for timings, counts for
+    sizes): log-linear buckets keep quantiles within ~6 % at any magnitude in fixed memory,
+    and `record` is a bit_length and an index increment. `scale` converts recorded values
+    to the exported unit (`NS` for seconds).
+    """
+
+    kind = "summary"
+
+    def __init__(self, name: str, help: str, labels: _Labels = (), scale: float = 1.0) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.scale = scale
+        self._counts = [0] * _BUCKETS
+        self._sum = 0
+        self._max = 0
+
+    def record(self, value: int) -> None:
+        """Record `value`, a non-negative int below 2**64."""
+        shift = value.bit_length() - SUB_BITS
+        self._counts[value if shift <= 0 else shift * _HALF + (value >> shift)] += 1
+        self._sum += value
+        if value > self._max:
+            self._max = value
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def quantiles(self, quantiles=QUANTILES) -> Dict[float, float]:
+        """Upper bound of the bucket holding each quantile, in exported units."""
+        counts = list(self._counts)
+        total, top = sum(counts), self._max
+        result = {}
+        for q in quantiles:
+            result[q] = 0.0
+            if not total:
+                continue
+            rank = max(1, int(q * total + 0.5))
+            seen = 0
+            for index, count in enumerate(counts):
+                seen += count
+                if seen >= rank:
+                    result[q] = min(_bucket_upper(index), top) * self.scale
+                    break
+        return result
+
+    def samples(self) -> List[Tuple[str, _Labels, float]]:
+        out = [
+            (self.name, self.labels + (("quantile", str(q)),), value) for q, value in self.quantiles().items()
+        ]
+        out.append((self.name + "_sum", self.labels, self._sum * self.scale))
+        out.append((self.name + "_count", self.labels, self.count))
+        out.append((self.name + "_max", self.labels, self._max * self.scale))
+        return out
+
+
+def _bucket_upper(index: int) -> int:
+    if index < 2 * _HALF:
+        return index
+    shift = index // _HALF - 1
+    top = index - shift * _HALF
+    return ((top + 1) << shift) - 1
+
+
+class MetricsRegistry:
+    """
+    Named counters, gauges and histograms. Getters create a metric on first use and return
+    the same object afterwards, so call sites can fetch theirs once and keep it.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[Tuple[str, _Labels], object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str = "", **labels: str) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str = "", **labels: str) -> Gauge:
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str = "", scale: float = 1.0, **labels: str) -> Histogram:
+        return self._get(Histogram, name, help, labels, scale=scale)
+
+    def collect(self) -> List[object]:
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda metric: (metric.name, metric.labels))
+
+    def snapshot(self) -> List[Tuple[str, str, float]]:
+        """`(name, labels, value)` rows of every sample, for display."""
+        rows = []
+        for metric in self.collect():
+            for name, labels, value in metric.samples():
+                rows.append((name, ",".join(f"{key}={val}" for key, val in labels), value))
+        return rows
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        described = set()
+        for metric in self.collect():
+            if metric.name not in described:
+                described.add(metric.name)
+                if metric.help:
+                    lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _get(self, cls, name: str, help: str, labels: Dict[str, str], **kwargs):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = cls(name, help, key[1], **kwargs)
+                    self._metrics[key] = metric
+        if not isinstance(metric, cls):
+            raise TypeError(f"metric {name} is a {metric.kind}, not a {cls.kind}")
+        return metric
+
+
+def _format_labels(labels: _Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return f"{value:.9g}"
+
+
+# The process-wide registry every component records into.
+REGISTRY = MetricsRegistry()
+
+
+def source_kind(source: str) -> str:
+    """Metric label for an entry source: "websocket:sim-1" and "import:app.log" collapse to their kind."""
+    return source.partition(":")[0]
+
+
+class MetricsServer:
+    """
+    Serves `registry.render()` at `GET /metrics` from the shared event loop. Deliberately
+    minimal HTTP: one request per connection, no keep-alive.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 9464,
+        registry: MetricsRegistry = REGISTRY,
+        loop: Optional[EventLoopThread] = None,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._registry = registry
+        self._loop = loop or shared_loop()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def start(self) -> None:
+        future: Future = self._loop.submit(self._start())
+        future.result()
+        emit("info", "MetricsServerStart", {"host": self._host, "port": self._port})
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._loop.submit(self._stop()).result()
+
+    async def _start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self._host, self._port)
+
+    async def _stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5.0)
+            method, _, rest = request.partition(b" ")
+            path = rest.split(b" ", 1)[0].split(b"?", 1)[0]
+            if method == b"GET" and path == b"/metrics":
+                status, body = "200 OK", self._registry.render().encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                status, body, content_type = "404 Not Found", b"not found\n", "text/plain"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii")
+                + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def add_metrics_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--metrics-port", type=int, default=0, help="Serve Prometheus metrics at http://HOST:PORT/metrics (0 = off)"
+    )
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="Interface for --metrics-port")
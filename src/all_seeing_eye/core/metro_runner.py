@@ -1,82 +1,215 @@
 from __future__ import annotations
 
-import subprocess
-import threading
-from typing import Optional, Callable, Sequence
+import asyncio
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Callable, Sequence
 
-from .ingest import parse_diagnostics_line, to_log_entry
-from .logger import emit
+from .batching import EntryBatcher
+from .event_loop import EventLoopThread, shared_loop
+from .health import HealthMonitor
+from .ingest import iter_diagnostics_lines, iter_log_entries_bytes
+from .logger import emit, is_enabled
 from .log_store import LogStore
+from .log_types import LogEntry
+from .metrics import NS, REGISTRY
+
+READ_CHUNK_BYTES = 256 * 1024
+# A partial line longer than this (no newline in sight) is discarded rather than buffered.
+MAX_LINE_BYTES = 1024 * 1024
+DEFAULT_METRO_PORT = 8081
+
+_READ_BYTES = REGISTRY.counter("ase_metro_read_bytes_total", "Bytes read from Metro stdout")
+_PARSE = REGISTRY.histogram("ase_metro_parse_seconds", "Time to split and parse one stdout chunk", scale=NS)
+_RESTARTS = REGISTRY.counter("ase_metro_restarts_total", "Metro restarts after a crash")
+_RUNNING = REGISTRY.gauge("ase_metro_running", "Metro processes currently running")
+
+
+@dataclass(frozen=True)
+class RestartPolicy:
+    """
+    Restart Metro when it exits non-zero without `stop()`: up to `max_restarts` times, waiting
+    `backoff_s` doubled per attempt (capped at `max_backoff_s`). A run that lasted
+    `reset_after_s` resets the count.
+    """
+
+    max_restarts: int = 3
+    backoff_s: float = 1.0
+    max_backoff_s: float = 30.0
+    reset_after_s: float = 60.0
 
 
 class MetroRunner:
     """
     Spawn `npm run start` in an Expo project and ingest `[Diagnostics]` JSON lines.
-    Runs in a background thread so the UI thread isn't blocked.
+    The process is driven by a coroutine on the shared event loop: stdout is read in
+    large byte chunks, split into lines here, and only lines containing the diagnostics
+    prefix are decoded, so many runners can share one thread. Runners may share one
+    `batcher`. The runner does not probe `port` itself: with a `health` monitor watching
+    it, `status()` reports the monitor's cached result.
     """
 
     def __init__(
         self,
         store: LogStore,
         on_state: Optional[Callable[[bool], None]] = None,
+        source: str = "metro",
+        loop: Optional[EventLoopThread] = None,
+        port: int = DEFAULT_METRO_PORT,
+        batcher: Optional[EntryBatcher] = None,
+        restart: Optional[RestartPolicy] = None,
+        health: Optional[HealthMonitor] = None,
     ) -> None:
         self._store = store
-        self._proc: Optional[subprocess.Popen[str]] = None
-        self._thread: Optional[threading.Thread] = None
+        self._source = source
+        self._loop = loop or shared_loop()
+        self._port = port
+        self._batcher = batcher
+        self._restart = restart
+        self._health = health
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._future: Optional[Future] = None
         self._running = False
+        self._stopping = False
+        self._restarts = 0
         self._on_state = on_state
 
     @property
     def is_running(self) -> bool:
         return self._running
 
+    @property
+    def source(self) -> str:
+        return self._source
+
+    @property
+    def port(self) -> int:
+        return self._port
+
+    def status(self) -> Dict[str, object]:
+        health = self._health.get("127.0.0.1", self._port) if self._health and self._running else None
+        return {
+            "source": self._source,
+            "port": self._port,
+            "running": self._running,
+            "healthy": health.listening if health else None,
+            "restarts": self._restarts,
+            "pid": self._proc.pid if self._proc else None,
+        }
+
     def start(self, project_dir: str) -> None:
         self.start_with_command(project_dir, ["npm", "run", "start"])
 
     def start_with_command(self, project_dir: str, command: Sequence[str]) -> None:
-        if self._thread and self._thread.is_alive():
+        if self._future and not self._future.done():
             return
+        emit("info", "MetroStart", {"project": project_dir, "command": list(command), "source": self._source})
+        self._stopping = False
+        self._future = self._loop.submit(self._supervise(project_dir, list(command)))
 
-        emit("info", "MetroStart", {"project": project_dir, "command": list(command)})
-        self._proc = subprocess.Popen(
-            list(command),
-            cwd=project_dir,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-        )
-
-        if not self._proc.stdout:
-            emit("error", "MetroStartFailed", {"error": "Failed to attach to Metro stdout"})
-            self._set_running(False)
-            return
+    def stop(self) -> None:
+        self._stopping = True
+        self._loop.call_soon(self._terminate)
+        self._set_running(False)
 
-        self._set_running(True)
-        self._thread = threading.Thread(target=self._tail, args=(self._proc.stdout,), daemon=True)
-        self._thread.start()
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Block until the Metro process has exited and its output is ingested."""
+        if self._future:
+            self._future.result(timeout)
 
-    def stop(self) -> None:
-        if self._proc and self._proc.poll() is None:
-            emit("info", "MetroStop", {})
+    def _terminate(self) -> None:
+        if self._proc and self._proc.returncode is None:
+            emit("info", "MetroStop", {"source": self._source})
             self._proc.terminate()
-        self._set_running(False)
 
-    def _tail(self, stdout) -> None:
+    async def _supervise(self, project_dir: str, command: List[str]) -> None:
+        batcher = self._batcher or EntryBatcher(self._store, background=True)
+        policy = self._restart
+        attempt = 0
         try:
-            for line in stdout:
-                payload = parse_diagnostics_line(line)
-                if not payload:
-                    continue
-                entry = to_log_entry(payload, source="metro")
-                self._store.add(entry)
-                emit("debug", "LogIngested", {"level": entry.level, "message": entry.message})
-        except Exception as exc:
-            emit("error", "MetroTailFailed", {"error": str(exc)})
+            while True:
+                started = time.monotonic()
+                code = await self._run(project_dir, command, batcher)
+                # Only crashes are retried: a clean exit or a command that won't start is final.
+                if self._stopping or policy is None or code in (None, 0):
+                    return
+                if time.monotonic() - started >= policy.reset_after_s:
+                    attempt = 0
+                if attempt >= policy.max_restarts:
+                    emit("error", "MetroGaveUp", {"source": self._source, "restarts": attempt})
+                    return
+                delay = min(policy.max_backoff_s, policy.backoff_s * 2**attempt)
+                attempt += 1
+                self._restarts += 1
+                _RESTARTS.inc()
+                emit("warn", "MetroRestart", {"source": self._source, "attempt": attempt, "delay_s": delay})
+                await asyncio.sleep(delay)
+                if self._stopping:
+                    return
         finally:
+            if batcher is self._batcher:
+                batcher.flush()
+            else:
+                batcher.close()
             self._set_running(False)
 
+    async def _run(self, project_dir: str, command: List[str], batcher: EntryBatcher) -> Optional[int]:
+        try:
+            self._proc = await asyncio.create_subprocess_exec(
+                *command,
+                cwd=project_dir,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+        except OSError as exc:
+            emit("error", "MetroStartFailed", {"error": str(exc), "source": self._source})
+            return None
+        self._set_running(True)
+        try:
+            await self._tail(self._proc.stdout, batcher)
+        except Exception as exc:
+            emit("error", "MetroTailFailed", {"error": str(exc), "source": self._source})
+        finally:
+            if self._proc.returncode is None:
+                self._proc.terminate()
+            code = await self._proc.wait()
+            emit("info", "MetroExited", {"source": self._source, "returncode": code})
+        return code
+
+    async def _tail(self, stdout: asyncio.StreamReader, batcher: EntryBatcher) -> None:
+        debug = is_enabled("debug")
+        partial = b""
+        while True:
+            chunk = await stdout.read(READ_CHUNK_BYTES)
+            _READ_BYTES.inc(len(chunk))
+            started = time.perf_counter_ns()
+            if not chunk:
+                block, partial = partial, b""
+            else:
+                data = partial + chunk if partial else chunk
+                cut = data.rfind(b"\n") + 1
+                block, partial = data[:cut], data[cut:]
+                if len(partial) > MAX_LINE_BYTES:
+                    partial = b""
+            entries = list(iter_log_entries_bytes(iter_diagnostics_lines(block), source=self._source))
+            _PARSE.record(time.perf_counter_ns() - started)
+            if entries:
+                # A background batcher only queues; the store work runs on its thread.
+                batcher.add_many(entries)
+                if debug:
+                    _log_ingested(entries)
+            if not chunk:
+                return
+
     def _set_running(self, value: bool) -> None:
+        if value != self._running:
+            _RUNNING.inc(1 if value else -1)
         self._running = value
         if self._on_state:
             self._on_state(self._running)
+
+
+def _log_ingested(entries: List[LogEntry]) -> None:
+    for entry in entries:
+        emit("debug", "LogIngested", {"level": entry.level, "message": entry.message})
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Callable
+from typing import Callable, Optional
 
 from .log_types import LogEntry
 from .logger import emit
@@ -13,5 +13,23 @@ class Notifier:
     def notify(self, entry: LogEntry) -> None:
         emit("info", "Notify", {"level": entry.level, "message": entry.message})
 
+    def notify_summary(self, title: str, body: str) -> None:
+        emit("info", "NotifySummary", {"title": title, "body": body})
+
     def handle_action(self, action: str) -> None:
         self._on_action(action)
+
+
+class NullNotifier(Notifier):
+    """Backend that shows nothing and only counts, for benchmarks and platforms without notifications."""
+
+    def __init__(self, on_action: Optional[Callable[[str], None]] = None) -> None:
+        super().__init__(on_action or (lambda _action: None))
+        self.notified = 0
+        self.summaries = 0
+
+    def notify(self, entry: LogEntry) -> None:
+        self.notified += 1
+
+    def notify_summary(self, title: str, body: str) -> None:
+        self.summaries += 1
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import time
 from typing import Callable
 
 from .log_types import LogEntry
@@ -74,14 +75,19 @@ class MacOSNotifier(Notifier):
 
     def notify(self, entry: LogEntry) -> None:
         super().notify(entry)
+        self._post(f"{entry.level.upper()} Error", entry.message, str(entry.id))
+
+    def notify_summary(self, title: str, body: str) -> None:
+        super().notify_summary(title, body)
+        self._post(title, body, f"summary-{time.monotonic_ns()}")
+
+    def _post(self, title: str, body: str, identifier: str) -> None:
         if not self._enabled:
             return
         content = UNMutableNotificationContent.alloc().init()
-        content.setTitle_(f"{entry.level.upper()} Error")
-        content.setBody_(entry.message)
+        content.setTitle_(title)
+        content.setBody_(body)
         content.setCategoryIdentifier_(CATEGORY_ID)
-        request = UNNotificationRequest.requestWithIdentifier_content_trigger_(
-            entry.id, content, None
-        )
+        request = UNNotificationRequest.requestWithIdentifier_content_trigger_(identifier, content, None)
         center = UNUserNotificationCenter.currentNotificationCenter()
         center.addNotificationRequest_withCompletionHandler_(request, lambda error: None)
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from .dedupe import fingerprint
+from .log_types import LogEntry
+from .logger import emit
+from .notifier import Notifier
+from .ws_limits import TokenBucket
+
+NOTIFY_LEVELS = frozenset({"warn", "error"})
+MAX_QUEUED_NOTIFICATIONS = 10_000
+MAX_COOLDOWN_FINGERPRINTS = 4096
+
+_PLURALS = {"error": "errors", "warn": "warnings"}
+
+
+class NotificationScheduler:
+    """
+    Sits between the store and a `Notifier`. `submit_many` (a batch subscriber) only
+    queues matching entries, so ingest never waits on the OS; a worker thread decides
+    what to show. The first entry of a fingerprint is shown on its own, then that
+    fingerprint is quiet for `cooldown_s`. Everything else is rolled up into one
+    "37 new errors in 5 s" summary per `rollup_s`. All notifications together are capped
+    at `max_per_minute`; what the cap holds back is folded into the next summary.
+    """
+
+    def __init__(
+        self,
+        notifier: Notifier,
+        levels: Iterable[str] = NOTIFY_LEVELS,
+        cooldown_s: float = 30.0,
+        rollup_s: float = 5.0,
+        max_per_minute: int = 6,
+        max_queued: int = MAX_QUEUED_NOTIFICATIONS,
+    ) -> None:
+        self._notifier = notifier
+        self._levels = frozenset(levels)
+        self._cooldown_s = cooldown_s
+        self._rollup_s = rollup_s
+        self._max_queued = max(1, max_queued)
+        self._bucket = TokenBucket(max_per_minute / 60.0, burst=max_per_minute)
+        self._queue: Deque[LogEntry] = deque()
+        self._cooldowns: "OrderedDict[int, float]" = OrderedDict()
+        self._rollup: Dict[str, int] = {}
+        self._rollup_started = 0.0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"delivered": 0, "summaries": 0, "rolled_up": 0, "dropped": 0}
+
+    def submit_many(self, entries: Iterable[LogEntry], _history=None) -> None:
+        wanted = [entry for entry in entries if entry.level in self._levels]
+        if not wanted:
+            return
+        with self._cond:
+            if self._closed:
+                return
+            self._queue.extend(wanted)
+            # Overflow is counted into the next summary rather than lost silently.
+            while len(self._queue) > self._max_queued:
+                self._add_to_rollup_locked(self._queue.popleft(), time.monotonic())
+                self._stats["dropped"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ase-notify", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def submit(self, entry: LogEntry, _history=None) -> None:
+        self.submit_many((entry,))
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {**self._stats, "queued": len(self._queue), "pending_rollup": sum(self._rollup.values())}
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Stop the worker after it has handled what is already queued."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    timeout = self._rollup_wait_locked()
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self._cond.wait(timeout)
+                batch = list(self._queue)
+                self._queue.clear()
+                closed = self._closed
+            now = time.monotonic()
+            for entry in batch:
+                self._consider(entry, now)
+            self._maybe_send_rollup(time.monotonic())
+            if closed:
+                return
+
+    def _rollup_wait_locked(self) -> Optional[float]:
+        """Seconds until the pending summary is due (or a token frees up); None if none pending."""
+        if not self._rollup:
+            return None
+        due = self._rollup_started + self._rollup_s - time.monotonic()
+        return max(due, self._bucket.delay())
+
+    def _consider(self, entry: LogEntry, now: float) -> None:
+        key = fingerprint(entry)
+        last = self._cooldowns.get(key)
+        if (last is None or now - last >= self._cooldown_s) and self._bucket.take(1):
+            self._cooldowns[key] = now
+            self._cooldowns.move_to_end(key)
+            while len(self._cooldowns) > MAX_COOLDOWN_FINGERPRINTS:
+                self._cooldowns.popitem(last=False)
+            self._deliver(entry)
+            return
+        with self._cond:
+            self._add_to_rollup_locked(entry, now)
+
+    def _add_to_rollup_locked(self, entry: LogEntry, now: float) -> None:
+        if not self._rollup:
+            self._rollup_started = now
+        self._rollup[entry.level] = self._rollup.get(entry.level, 0) + 1
+        self._stats["rolled_up"] += 1
+
+    def _maybe_send_rollup(self, now: float) -> None:
+        with self._cond:
+            if not self._rollup or now - self._rollup_started < self._rollup_s:
+                return
+            if not self._bucket.take(1):
+                return
+            counts, self._rollup = self._rollup, {}
+            elapsed = now - self._rollup_started
+            self._stats["summaries"] += 1
+        title, body = rollup_text(counts, elapsed)
+        try:
+            self._notifier.notify_summary(title, body)
+        except Exception as exc:
+            emit("error", "NotifyFailed", {"error": str(exc)})
+
+    def _deliver(self, entry: LogEntry) -> None:
+        with self._cond:
+            self._stats["delivered"] += 1
+        try:
+            self._notifier.notify(entry)
+        except Exception as exc:
+            emit("error", "NotifyFailed", {"error": str(exc)})
+
+
+def rollup_text(counts: Dict[str, int], elapsed_s: float) -> Tuple[str, str]:
+    """Title and body of a summary, e.g. ("37 new errors", "37 new errors in 5 s")."""
+    parts = [
+        f"{counts[level]} new {_PLURALS.get(level, level) if counts[level] != 1 else level}"
+        for level in sorted(counts, key=lambda level: -counts[level])
+    ]
+    title = " and ".join(parts)
+    return title, f"{title} in {max(1, round(elapsed_s))} s"
+
+
+def add_notify_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--notify-cooldown", type=float, default=30.0, help="Seconds before the same warn/error notifies again"
+    )
+    parser.add_argument(
+        "--notify-rollup", type=float, default=5.0, help="Seconds of further warns/errors summed into one notification"
+    )
+    parser.add_argument(
+        "--notify-max-per-minute", type=int, default=6, help="Cap on notifications of any kind per minute (0 = no cap)"
+    )
+
+
+def scheduler_from_args(notifier: Notifier, args: argparse.Namespace) -> NotificationScheduler:
+    return NotificationScheduler(
+        notifier,
+        cooldown_s=args.notify_cooldown,
+        rollup_s=args.notify_rollup,
+        max_per_minute=args.notify_max_per_minute,
+    )
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import shlex
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .log_types import LogEntry, entry_epoch
+
+FIELD_PREFIXES = ("level:", "source:", "data.")
+TIME_PREFIXES = ("since:", "until:")
+
+# (is_field, text): field terms are exact "level:error" / "data.key:value" keys,
+# other terms are case-insensitive substrings of the entry text.
+QueryTerm = Tuple[bool, str]
+
+
+@dataclass(frozen=True)
+class LogQuery:
+    """
+    Parsed search query: an OR of clauses, each clause an AND of terms, plus an optional
+    time range. Syntax: `timeout level:error`, `a OR b`, `data.screen:home`,
+    `since:2026-02-06T16:00 until:2026-02-06T17:00`.
+    """
+
+    clauses: Tuple[Tuple[QueryTerm, ...], ...]
+    since: Optional[float] = None
+    until: Optional[float] = None
+
+    def matches(self, entry: LogEntry) -> bool:
+        if not self.in_range(entry_epoch(entry)):
+            return False
+        if not self.clauses:
+            return True
+        text = entry_text(entry)
+        fields = entry_fields(entry)
+        return any(
+            all((value in fields) if is_field else (value in text) for is_field, value in clause)
+            for clause in self.clauses
+        )
+
+    def in_range(self, ts: float) -> bool:
+        if self.since is not None and ts < self.since:
+            return False
+        if self.until is not None and ts > self.until:
+            return False
+        return True
+
+
+def is_structured_query(text: str) -> bool:
+    lowered = text.lower()
+    return " or " in f" {lowered} " or any(p in lowered for p in FIELD_PREFIXES + TIME_PREFIXES)
+
+
+def parse_query(text: str) -> LogQuery:
+    try:
+        words = shlex.split(text)
+    except ValueError:
+        words = text.split()
+
+    clauses: List[Tuple[QueryTerm, ...]] = []
+    current: List[QueryTerm] = []
+    since: Optional[float] = None
+    until: Optional[float] = None
+    for word in words:
+        if word == "OR":
+            if current:
+                clauses.append(tuple(current))
+            current = []
+            continue
+        lowered = word.lower()
+        if lowered.startswith(TIME_PREFIXES):
+            key, _, value = lowered.partition(":")
+            ts = _parse_time(value)
+            if ts is not None:
+                if key == "since":
+                    since = ts
+                else:
+                    until = ts
+                continue
+        if lowered.startswith(FIELD_PREFIXES) and ":" in lowered:
+            current.append((True, lowered))
+        elif lowered:
+            current.append((False, lowered))
+    if current:
+        clauses.append(tuple(current))
+    return LogQuery(clauses=tuple(clauses), since=since, until=until)
+
+
+class LogIndex:
+    """
+    Token and trigram inverted index over log entries, keyed by any integer the owner
+    chooses: `LogStore` sequence numbers, entry ids or model rows.
+    Field tokens (`level:`, `source:`, `data.key:value`) are matched exactly; free-text terms
+    are narrowed with trigram postings and then verified as substrings.
+    """
+
+    def __init__(self) -> None:
+        self._fields: Dict[str, Set[int]] = {}
+        self._trigrams: Dict[str, Set[int]] = {}
+        self._text: Dict[int, str] = {}
+        self._epochs: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._text)
+
+    def clear(self) -> None:
+        self._fields.clear()
+        self._trigrams.clear()
+        self._text.clear()
+        self._epochs.clear()
+
+    def add(self, seq: int, entry: LogEntry) -> None:
+        text = entry_text(entry)
+        self._text[seq] = text
+        self._epochs[seq] = entry_epoch(entry)
+        for key in entry_fields(entry):
+            self._fields.setdefault(key, set()).add(seq)
+        for gram in _trigrams(text):
+            self._trigrams.setdefault(gram, set()).add(seq)
+
+    def remove(self, seq: int, entry: LogEntry) -> None:
+        text = self._text.pop(seq, None)
+        if text is None:
+            return
+        self._epochs.pop(seq, None)
+        _discard(self._fields, entry_fields(entry), seq)
+        _discard(self._trigrams, _trigrams(text), seq)
+
+    def search(self, query: LogQuery | str) -> List[int]:
+        if isinstance(query, str):
+            query = parse_query(query)
+        if query.clauses:
+            hits: Set[int] = set()
+            for clause in query.clauses:
+                hits |= self._match_clause(clause)
+        else:
+            hits = set(self._text)
+        return sorted(seq for seq in hits if query.in_range(self._epochs[seq]))
+
+    def _match_clause(self, clause: Tuple[QueryTerm, ...]) -> Set[int]:
+        candidates: Optional[Set[int]] = None
+        # Exact field postings and long terms narrow fastest, so apply them first.
+        for is_field, value in sorted(clause, key=lambda term: (not term[0], -len(term[1]))):
+            if is_field:
+                postings = self._fields.get(value, set())
+            else:
+                postings = self._match_text(value, candidates)
+            candidates = postings if candidates is None else candidates & postings
+            if not candidates:
+                return set()
+        return candidates or set()
+
+    def _match_text(self, term: str, within: Optional[Set[int]]) -> Set[int]:
+        if within is None and len(term) >= 3:
+            postings = [self._trigrams.get(gram, set()) for gram in _trigrams(term)]
+            postings.sort(key=len)
+            within = set(postings[0]).intersection(*postings[1:])
+        pool: Iterable[int] = self._text if within is None else within
+        return {seq for seq in pool if term in self._text[seq]}
+
+
+def entry_text(entry: LogEntry) -> str:
+    parts = [entry.level, entry.source, entry.message]
+    for key, value in _flatten(entry.data):
+        parts.append(key)
+        parts.append(value)
+    return " ".join(parts).lower()
+
+
+def entry_fields(entry: LogEntry) -> Set[str]:
+    fields = {f"level:{entry.level}".lower(), f"source:{entry.source}".lower()}
+    for key, value in _flatten(entry.data):
+        fields.add(f"data.{key}:{value}".lower())
+    return fields
+
+
+def _flatten(data: Optional[Dict[str, Any]], prefix: str = "") -> Iterator[Tuple[str, str]]:
+    if not data:
+        return
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{path}.")
+        elif isinstance(value, list):
+            for item in value:
+                yield path, str(item)
+        else:
+            yield path, str(value)
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _discard(postings: Dict[str, Set[int]], keys: Iterable[str], seq: int) -> None:
+    for key in keys:
+        bucket = postings.get(key)
+        if bucket is None:
+            continue
+        bucket.discard(seq)
+        if not bucket:
+            del postings[key]
+
+
+def _parse_time(value: str) -> Optional[float]:
+    try:
+        ts = datetime.fromisoformat(value.upper().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
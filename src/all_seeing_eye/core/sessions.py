@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import heapq
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .log_store import LogStore
+from .log_types import LogEntry
+
+DEFAULT_SESSION = "websocket"
+SESSION_SOURCE_PREFIX = "websocket:"
+_SESSION_ID = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+@dataclass
+class Session:
+    """One device/session: its own ring buffer plus running counters."""
+
+    key: str
+    device: str
+    store: LogStore
+    connections: int = 0
+    entries: int = 0
+    dropped: int = 0
+    first_seen: float = field(default_factory=time.time)
+    last_seen: float = field(default_factory=time.time)
+
+    @property
+    def source(self) -> str:
+        """The `source` stamped on this session's entries; equal to `key`."""
+        return self.key
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "session": self.key,
+            "device": self.device,
+            "connections": self.connections,
+            "entries": self.entries,
+            "dropped": self.dropped,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+        }
+
+
+class SessionRegistry:
+    """
+    Partitions WebSocket ingest by session. A client names its session in the query
+    string (`ws://host:port/?session=sim-1&device=iPhone`) or with a first
+    `{"type": "hello", "session": ..., "device": ...}` frame; anonymous clients share
+    the `websocket` session. Each session keeps a `max_history` ring buffer so views
+    can switch to or merge sessions without scanning the global history. Those rings are
+    filled from the main store they are `attach`ed to, so they hold exactly what it kept
+    after dedupe. Once more than `max_sessions` exist, the least recently seen
+    disconnected session is forgotten.
+    """
+
+    def __init__(self, max_history: int = 5_000, max_sessions: int = 64) -> None:
+        self._max_history = max_history
+        self._max_sessions = max_sessions
+        self._sessions: Dict[str, Session] = {}
+        self._attached: List[LogStore] = []
+        self._lock = threading.Lock()
+
+    def attach(self, store: LogStore) -> None:
+        """Copy session entries that `store` accepts into their session rings; idempotent."""
+        with self._lock:
+            if any(attached is store for attached in self._attached):
+                return
+            self._attached.append(store)
+        store.subscribe_batch(self._on_batch)
+
+    def open(self, session_id: Optional[str] = None, device: Optional[str] = None) -> Session:
+        key = session_key(session_id)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = Session(
+                    key=key,
+                    device=(device or session_id or "anonymous")[:64],
+                    store=LogStore(max_history=self._max_history, name="session"),
+                )
+                self._sessions[key] = session
+            elif device:
+                session.device = device[:64]
+            session.connections += 1
+            session.last_seen = time.time()
+            self._evict_locked()
+            return session
+
+    def close(self, session: Session) -> None:
+        with self._lock:
+            session.connections = max(0, session.connections - 1)
+            session.last_seen = time.time()
+
+    def note_received(self, session: Session, count: int) -> None:
+        with self._lock:
+            session.entries += count
+            session.last_seen = time.time()
+
+    def note_dropped(self, session: Session, count: int) -> None:
+        if count:
+            with self._lock:
+                session.dropped += count
+
+    def get(self, key: str) -> Optional[Session]:
+        with self._lock:
+            return self._sessions.get(key)
+
+    def sessions(self) -> List[Session]:
+        with self._lock:
+            return sorted(self._sessions.values(), key=lambda s: s.first_seen)
+
+    def stats(self) -> List[Dict[str, object]]:
+        with self._lock:
+            return [s.stats() for s in sorted(self._sessions.values(), key=lambda s: s.first_seen)]
+
+    def merged(self, keys: Iterable[str]) -> List[LogEntry]:
+        """History of the given sessions merged in arrival (entry id) order."""
+        with self._lock:
+            stores = [self._sessions[k].store for k in keys if k in self._sessions]
+        return list(heapq.merge(*(store.get_all() for store in stores), key=lambda e: e.id))
+
+    def _on_batch(self, entries: Sequence[LogEntry], _history=None) -> None:
+        groups: Dict[str, List[LogEntry]] = {}
+        for entry in entries:
+            if entry.source == DEFAULT_SESSION or entry.source.startswith(SESSION_SOURCE_PREFIX):
+                groups.setdefault(entry.source, []).append(entry)
+        for key, batch in groups.items():
+            session = self.get(key)
+            if session is not None:
+                session.store.add_many(batch)
+
+    def _evict_locked(self) -> None:
+        while len(self._sessions) > self._max_sessions:
+            idle = [s for s in self._sessions.values() if not s.connections]
+            if not idle:
+                return
+            del self._sessions[min(idle, key=lambda s: s.last_seen).key]
+
+
+def session_key(session_id: Optional[str]) -> str:
+    cleaned = _SESSION_ID.sub("-", session_id or "").strip("-")[:64]
+    return f"{SESSION_SOURCE_PREFIX}{cleaned}" if cleaned else DEFAULT_SESSION
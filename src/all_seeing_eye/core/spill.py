@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+import tempfile
+from array import array
+from typing import List
+
+from .log_types import LogEntry, entry_from_dict, entry_to_dict
+
+
+class SpillFile:
+    """
+    Append-only scratch file for rows evicted from a UI model.
+    Rows are addressed by their append position and can be read back in ranges.
+    """
+
+    def __init__(self) -> None:
+        self._file = tempfile.TemporaryFile(prefix="all_seeing_eye_spill_")
+        self._offsets = array("q")
+        self._end = 0
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def append(self, entries: List[LogEntry]) -> None:
+        self._file.seek(self._end)
+        for entry in entries:
+            line = json.dumps(entry_to_dict(entry), default=str).encode("utf-8") + b"\n"
+            self._offsets.append(self._end)
+            self._file.write(line)
+            self._end += len(line)
+
+    def read(self, start: int, stop: int) -> List[LogEntry]:
+        start = max(0, start)
+        stop = min(stop, len(self._offsets))
+        if start >= stop:
+            return []
+        self._file.flush()
+        self._file.seek(self._offsets[start])
+        end = self._offsets[stop] if stop < len(self._offsets) else self._end
+        raw = self._file.read(end - self._offsets[start])
+        return [entry_from_dict(json.loads(line)) for line in raw.splitlines()]
+
+    def reset(self) -> None:
+        self._file.seek(0)
+        self._file.truncate()
+        self._offsets = array("q")
+        self._end = 0
+
+    def close(self) -> None:
+        self._file.close()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Sequence, Tuple
+
+from .log_types import LogEntry
+
+OVERFLOW_POLICIES = ("drop-oldest", "drop-debug-first", "sample")
+
+
+@dataclass(frozen=True)
+class WsLimits:
+    """
+    Per-connection ingest limits. `rate_per_s` entries/second refill a token bucket of
+    `burst` tokens (0 disables rate limiting); at most `max_queued` entries wait per
+    connection and `overflow` picks what is dropped once that queue is full. With
+    "sample", one of every `sample_every` overflowing entries is kept.
+    """
+
+    rate_per_s: float = 5_000.0
+    burst: int = 10_000
+    max_queued: int = 10_000
+    overflow: str = "drop-oldest"
+    sample_every: int = 10
+
+    def __post_init__(self) -> None:
+        if self.overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(OVERFLOW_POLICIES)}")
+        if self.max_queued < 1:
+            raise ValueError("max_queued must be at least 1")
+
+
+class TokenBucket:
+    def __init__(self, rate_per_s: float, burst: int) -> None:
+        self._rate = rate_per_s
+        self._burst = max(1, burst)
+        self._tokens = float(self._burst)
+        self._last = time.monotonic()
+
+    def take(self, wanted: int) -> int:
+        """Grant up to `wanted` tokens right now; returns how many were granted."""
+        if self._rate <= 0:
+            return wanted
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+        granted = min(wanted, int(self._tokens))
+        self._tokens -= granted
+        return granted
+
+    def delay(self) -> float:
+        """Seconds until at least one token is available."""
+        if self._rate <= 0:
+            return 0.0
+        # Count the refill since the last `take`, so repeated waits converge.
+        tokens = self._tokens + (time.monotonic() - self._last) * self._rate
+        return max(0.0, (1 - tokens) / self._rate)
+
+
+class ConnectionQueue:
+    """
+    Bounded FIFO of entries from one connection. Debug entries are held apart from the
+    rest (tagged with an arrival number so `take` still returns arrival order), which
+    makes "drop-debug-first" O(1) per dropped entry.
+    """
+
+    def __init__(self, limits: WsLimits) -> None:
+        self._limits = limits
+        self._debug: Deque[Tuple[int, LogEntry]] = deque()
+        self._other: Deque[Tuple[int, LogEntry]] = deque()
+        self._arrivals = itertools.count()
+        self._overflowed = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._debug) + len(self._other)
+
+    def push(self, entries: Sequence[LogEntry]) -> None:
+        max_queued = self._limits.max_queued
+        for entry in entries:
+            if len(self) >= max_queued and not self._make_room(entry):
+                self.dropped += 1
+                continue
+            lane = self._debug if entry.level == "debug" else self._other
+            lane.append((next(self._arrivals), entry))
+
+    def take(self, count: int) -> List[LogEntry]:
+        debug, other = self._debug, self._other
+        out: List[LogEntry] = []
+        while len(out) < count and (debug or other):
+            if not other or (debug and debug[0][0] < other[0][0]):
+                out.append(debug.popleft()[1])
+            else:
+                out.append(other.popleft()[1])
+        return out
+
+    def _make_room(self, incoming: LogEntry) -> bool:
+        """Evict one queued entry for `incoming` per the overflow policy; False drops `incoming`."""
+        policy = self._limits.overflow
+        if policy == "drop-debug-first":
+            if incoming.level == "debug":
+                return False
+            if self._debug:
+                self._debug.popleft()
+                self.dropped += 1
+                return True
+        elif policy == "sample":
+            self._overflowed += 1
+            if self._overflowed % max(1, self._limits.sample_every):
+                return False
+        self._pop_oldest()
+        self.dropped += 1
+        return True
+
+    def _pop_oldest(self) -> None:
+        debug, other = self._debug, self._other
+        if not other or (debug and debug[0][0] < other[0][0]):
+            debug.popleft()
+        else:
+            other.popleft()
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def add_ws_limit_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = WsLimits()
+    parser.add_argument(
+        "--ws-rate", type=float, default=defaults.rate_per_s, help="Entries/sec per WebSocket client (0 = unlimited)"
+    )
+    parser.add_argument("--ws-burst", type=int, default=defaults.burst, help="Token-bucket burst per client")
+    parser.add_argument(
+        "--ws-queue", type=_positive_int, default=defaults.max_queued, help="Entries queued per client before dropping"
+    )
+    parser.add_argument(
+        "--ws-overflow", choices=OVERFLOW_POLICIES, default=defaults.overflow, help="What to drop when a client's queue is full"
+    )
+
+
+def ws_limits_from_args(args: argparse.Namespace) -> WsLimits:
+    return WsLimits(
+        rate_per_s=args.ws_rate,
+        burst=args.ws_burst,
+        max_queued=args.ws_queue,
+        overflow=args.ws_overflow,
+    )
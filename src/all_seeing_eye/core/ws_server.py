@@ -2,14 +2,51 @@ from __future__ import annotations
 
 import asyncio
 import json
-import threading
-from typing import Optional, Callable
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Callable, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
 
+from websockets.exceptions import ConnectionClosed
 from websockets.server import serve
 
-from .ingest import parse_diagnostics_line, to_log_entry
-from .logger import emit
+from .batching import EntryBatcher
+from .event_loop import EventLoopThread, shared_loop
+from .ingest import parse_frame
+from .logger import emit, is_enabled
 from .log_store import LogStore
+from .log_types import LogEntry
+from .metrics import NS, REGISTRY
+from .sessions import Session, SessionRegistry
+from .ws_limits import ConnectionQueue, TokenBucket, WsLimits
+
+# Frames at least this large are decoded on a worker thread so the event loop keeps
+# serving other connections while one device uploads its backlog.
+OFFLOAD_FRAME_BYTES = 64 * 1024
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+# Entries handed to the batcher per drain step, and how often clients hear about drops.
+DRAIN_CHUNK = 1_024
+DROP_REPORT_INTERVAL_S = 1.0
+
+_FRAMES = REGISTRY.counter("ase_ws_frames_total", "WebSocket frames received")
+_FRAME_BYTES = REGISTRY.counter("ase_ws_frame_bytes_total", "WebSocket payload bytes received")
+_EMPTY_FRAMES = REGISTRY.counter("ase_ws_empty_frames_total", "WebSocket frames that yielded no entries")
+_ENTRIES = REGISTRY.counter("ase_ws_entries_total", "Entries parsed from WebSocket frames")
+_DECODE = REGISTRY.histogram("ase_ws_decode_seconds", "Time to decode one WebSocket frame", scale=NS)
+_DROPPED = REGISTRY.counter("ase_ws_dropped_total", "Entries dropped from full connection queues")
+_CONNECTIONS = REGISTRY.gauge("ase_ws_connections", "Open WebSocket connections")
+
+
+class _Connection:
+    def __init__(self, limits: WsLimits, session: Session) -> None:
+        self.session = session
+        self.counted_dropped = 0
+        self.queue = ConnectionQueue(limits)
+        self.bucket = TokenBucket(limits.rate_per_s, limits.burst)
+        self.wakeup = asyncio.Event()
+        self.closed = False
+        self.reported_dropped = 0
+        self.last_report = 0.0
 
 
 class WebSocketIngestServer:
@@ -19,73 +56,215 @@ class WebSocketIngestServer:
         host: str = "127.0.0.1",
         port: int = 8765,
         on_state: Optional[Callable[[bool], None]] = None,
+        limits: Optional[WsLimits] = None,
+        sessions: Optional[SessionRegistry] = None,
+        loop: Optional[EventLoopThread] = None,
     ) -> None:
         self._store = store
+        self._limits = limits or WsLimits()
+        self._sessions = sessions or SessionRegistry()
+        self._sessions.attach(store)
+        self._connections: Set[_Connection] = set()
+        self._closed_dropped = 0
+        self._batcher = EntryBatcher(store, background=True)
+        self._parse_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ws-parse")
         self._host = host
         self._port = port
-        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop = loop or shared_loop()
         self._server = None
-        self._thread: Optional[threading.Thread] = None
+        self._started = False
+        self._stopped: Optional[Future] = None
         self._running = False
         self._on_state = on_state
 
     def start(self) -> None:
-        if self._thread:
+        if self._started:
             return
-        self._thread = threading.Thread(target=self._run, daemon=True)
-        self._thread.start()
+        self._started = True
+        self._loop.submit(self._serve()).add_done_callback(self._on_serve_done)
 
     def stop(self) -> None:
-        if not self._loop:
+        if not self._started or self._stopped is not None:
             return
-        self._loop.call_soon_threadsafe(lambda: asyncio.create_task(self._shutdown()))
+        self._stopped = self._loop.submit(self._shutdown())
         self._set_running(False)
 
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Block until a `stop()` has closed the server and flushed what it ingested."""
+        if self._stopped is not None:
+            self._stopped.result(timeout)
+
     @property
     def is_running(self) -> bool:
         return self._running
 
-    def _run(self) -> None:
-        self._loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self._loop)
-        try:
-            self._loop.run_until_complete(self._serve())
-        except Exception as exc:
+    @property
+    def sessions(self) -> SessionRegistry:
+        return self._sessions
+
+    def stats(self) -> Dict[str, int]:
+        """Open connections, entries waiting in their queues and entries dropped so far."""
+        connections = list(self._connections)
+        return {
+            "connections": len(connections),
+            "queued": sum(len(c.queue) for c in connections),
+            "dropped": self._closed_dropped + sum(c.queue.dropped for c in connections),
+        }
+
+    def _on_serve_done(self, future) -> None:
+        exc = None if future.cancelled() else future.exception()
+        if exc is not None:
             emit("error", "WebSocketStartFailed", {"error": str(exc)})
             self._set_running(False)
-            return
-        self._loop.run_forever()
 
     async def _serve(self) -> None:
         emit("info", "WebSocketStart", {"host": self._host, "port": self._port})
-        self._server = await serve(self._handler, self._host, self._port)
+        self._server = await serve(
+            self._handler,
+            self._host,
+            self._port,
+            compression="deflate",
+            max_size=MAX_FRAME_BYTES,
+        )
         self._set_running(True)
 
     async def _shutdown(self) -> None:
         if self._server:
             self._server.close()
             await self._server.wait_closed()
-        if self._loop:
-            self._loop.stop()
+        # The loop is shared with other sources: wait for in-flight parses off the loop.
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._parse_pool.shutdown)
+        # Each server owns its batcher; closing it flushes and ends its thread.
+        await loop.run_in_executor(None, self._batcher.close)
         self._set_running(False)
 
     async def _handler(self, websocket) -> None:
-        async for message in websocket:
-            self._handle_message(message)
-
-    def _handle_message(self, message: str) -> None:
-        payload = None
+        loop = asyncio.get_running_loop()
+        session_id, device = _query_identity(websocket.path)
+        first = None
+        if session_id is None:
+            # No identity in the URL: the client may introduce itself with a hello frame.
+            try:
+                first = await websocket.recv()
+            except ConnectionClosed:
+                return
+            hello = _hello_identity(first)
+            if hello is not None:
+                session_id, device = hello
+                first = None
+        conn = _Connection(self._limits, self._sessions.open(session_id, device))
+        emit("info", "WebSocketSession", {"session": conn.session.key, "device": conn.session.device})
+        self._connections.add(conn)
+        _CONNECTIONS.inc()
+        drain = asyncio.create_task(self._drain(conn, websocket))
         try:
-            payload = json.loads(message)
-        except json.JSONDecodeError:
-            payload = parse_diagnostics_line(message)
-        if not payload:
+            async for message in _prepend(first, websocket):
+                source = conn.session.source
+                started = time.perf_counter_ns()
+                if len(message) >= OFFLOAD_FRAME_BYTES:
+                    # Awaiting keeps this connection's frames in order; other connections run meanwhile.
+                    entries = await loop.run_in_executor(self._parse_pool, parse_frame, message, source)
+                else:
+                    entries = parse_frame(message, source=source)
+                _DECODE.record(time.perf_counter_ns() - started)
+                _FRAMES.inc()
+                _FRAME_BYTES.inc(len(message))
+                if not entries:
+                    _EMPTY_FRAMES.inc()
+                    continue
+                _ENTRIES.inc(len(entries))
+                conn.queue.push(entries)
+                conn.wakeup.set()
+        finally:
+            conn.closed = True
+            conn.wakeup.set()
+            await drain
+            self._connections.discard(conn)
+            _CONNECTIONS.dec()
+            self._closed_dropped += conn.queue.dropped
+            self._sessions.close(conn.session)
+
+    async def _drain(self, conn: _Connection, websocket) -> None:
+        """Move queued entries to the batcher at the connection's rate limit."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await conn.wakeup.wait()
+            conn.wakeup.clear()
+            while len(conn.queue):
+                # Once the client is gone, whatever it managed to queue goes through unthrottled.
+                wanted = min(len(conn.queue), DRAIN_CHUNK)
+                granted = wanted if conn.closed else conn.bucket.take(wanted)
+                if not granted:
+                    await self._report_drops(conn, websocket)
+                    await asyncio.sleep(conn.bucket.delay())
+                    continue
+                entries = conn.queue.take(granted)
+                if len(entries) >= 256:
+                    await loop.run_in_executor(self._parse_pool, self._deliver, conn.session, entries)
+                else:
+                    self._deliver(conn.session, entries)
+                await asyncio.sleep(0)
+            self._sessions.note_dropped(conn.session, conn.queue.dropped - conn.counted_dropped)
+            _DROPPED.inc(conn.queue.dropped - conn.counted_dropped)
+            conn.counted_dropped = conn.queue.dropped
+            await self._report_drops(conn, websocket)
+            if conn.closed:
+                return
+
+    async def _report_drops(self, conn: _Connection, websocket) -> None:
+        dropped = conn.queue.dropped
+        now = time.monotonic()
+        if dropped == conn.reported_dropped or conn.closed or now - conn.last_report < DROP_REPORT_INTERVAL_S:
             return
-        entry = to_log_entry(payload, source="websocket")
-        self._store.add(entry)
-        emit("debug", "LogIngested", {"level": entry.level, "message": entry.message})
+        conn.last_report = now
+        message = {"type": "dropped", "count": dropped - conn.reported_dropped, "total": dropped}
+        conn.reported_dropped = dropped
+        try:
+            await websocket.send(json.dumps(message))
+        except ConnectionClosed:
+            pass
+        emit("warn", "WebSocketDropped", {"count": message["count"], "policy": self._limits.overflow})
+
+    def _deliver(self, session: Session, entries: List[LogEntry]) -> None:
+        self._sessions.note_received(session, len(entries))
+        self._batcher.add_many(entries)
+        if is_enabled("debug"):
+            self._log_ingested(entries)
+
+    @staticmethod
+    def _log_ingested(entries: List[LogEntry]) -> None:
+        for entry in entries:
+            emit("debug", "LogIngested", {"level": entry.level, "message": entry.message})
 
     def _set_running(self, value: bool) -> None:
         self._running = value
         if self._on_state:
             self._on_state(self._running)
+
+
+def _query_identity(path: str) -> Tuple[Optional[str], Optional[str]]:
+    params = parse_qs(urlsplit(path or "").query)
+    session = (params.get("session") or [None])[0]
+    device = (params.get("device") or [None])[0]
+    return session, device
+
+
+def _hello_identity(message) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    if len(message) > 4096:
+        return None
+    try:
+        payload = json.loads(message)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(payload, dict) or payload.get("type") != "hello":
+        return None
+    session, device = payload.get("session"), payload.get("device")
+    return (str(session) if session else None, str(device) if device else None)
+
+
+async def _prepend(first, websocket):
+    if first is not None:
+        yield first
+    async for message in websocket:
+        yield message
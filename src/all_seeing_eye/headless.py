@@ -3,48 +3,183 @@ from __future__ import annotations
 import argparse
 import sys
 import time
-from typing import Optional
+from typing import Dict, List, Optional
 
-from .core.ingest import parse_diagnostics_line, to_log_entry
+from .core.batching import EntryBatcher
+from .core.bulk_import import BulkImporter
+from .core.columnar import HAS_NUMPY, ColumnarHistory
+from .core.dedupe import add_dedupe_arguments, deduplicator_from_args
+from .core.dispatch import DispatchPolicy, add_dispatch_arguments, dispatch_from_args
+from .core.file_tail import TailOffsets, add_tail_arguments
+from .core.ingest import iter_log_entries_bytes
+from .core.journal import LogJournal
 from .core.log_store import LogStore
-from .core.logger import emit
-from .core.metro import MetroTail
+from .core.log_types import LogEntry
+from .core.logger import LEVELS, emit, set_level
+from .core.metrics import MetricsServer, add_metrics_arguments
+from .core.controller import IngestController, parse_project_arg
+from .core.search import LogIndex
+from .core.ws_limits import add_ws_limit_arguments, ws_limits_from_args
 from .core.ws_server import WebSocketIngestServer
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="All Seeing Eye headless ingest")
-    parser.add_argument("--project", help="Path to Expo project (runs Metro)")
+    parser.add_argument(
+        "--project",
+        action="append",
+        help="Path to Expo project (runs Metro); repeat for several projects, DIR:PORT picks the port",
+    )
     parser.add_argument("--stdin", action="store_true", help="Read logs from stdin")
+    parser.add_argument(
+        "--import",
+        dest="import_paths",
+        nargs="+",
+        metavar="FILE",
+        help="Bulk-import saved logs, parsed in parallel and merged by timestamp ('-' reads stdin)",
+    )
+    parser.add_argument(
+        "--import-workers", type=int, help="Parser processes for --import (default: one per CPU)"
+    )
+    add_tail_arguments(parser)
     parser.add_argument("--ws", action="store_true", help="Start WebSocket ingest server")
     parser.add_argument("--ws-host", default="127.0.0.1", help="WebSocket host")
     parser.add_argument("--ws-port", type=int, default=8765, help="WebSocket port")
+    add_ws_limit_arguments(parser)
+    parser.add_argument(
+        "--log-level",
+        choices=sorted(LEVELS, key=LEVELS.get),
+        help="Minimum level of All Seeing Eye's own log lines (default: $ALL_SEEING_EYE_LOG_LEVEL or info)",
+    )
+    add_dedupe_arguments(parser, default_window_s=0.0)
+    add_dispatch_arguments(parser)
+    add_metrics_arguments(parser)
+    parser.add_argument("--journal", help="Directory for the persistent log journal")
+    parser.add_argument(
+        "--replay", type=int, default=2000, help="Entries to replay from the journal on startup"
+    )
+    parser.add_argument(
+        "--query",
+        help="With --stdin/--import: index every entry read and print those matching this query at EOF "
+        "(e.g. 'timeout level:error', 'a OR b', 'data.screen:home', 'since:2026-02-06T16:00')",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="With --stdin/--import: print per-level counts, per-second rates and top messages at EOF (needs numpy)",
+    )
     return parser
 
 
 def main(argv: Optional[list[str]] = None) -> int:
     args = build_arg_parser().parse_args(argv)
+    if args.log_level:
+        set_level(args.log_level)
 
-    store = LogStore(max_history=2000)
+    journal = LogJournal(args.journal) if args.journal else None
+    store = LogStore(
+        max_history=2000,
+        journal=journal,
+        dedupe=deduplicator_from_args(args),
+        dispatch=dispatch_from_args(args),
+    )
+    if journal:
+        store.restore(journal.tail(args.replay))
+
+    metrics_server = None
+    if args.metrics_port:
+        metrics_server = MetricsServer(args.metrics_host, args.metrics_port)
+        try:
+            metrics_server.start()
+        except OSError as exc:
+            emit("error", "MetricsServerFailed", {"port": args.metrics_port, "error": str(exc)})
+            metrics_server = None
 
     def on_entry(entry, _history):
-        emit("info", "HeadlessLog", {"level": entry.level, "message": entry.message})
+        emit("info", "HeadlessLog", {"level": entry.level, "message": entry.message}, block=True)
+
+    if not args.query:
+        store.subscribe(on_entry)
+
+    # The query sees every stored entry, not just what the 2000-entry ring still holds:
+    # the index is keyed by entry id and keeps its own references. "block" makes the
+    # subscriber lossless even when --dispatch defaults to dropping.
+    query_index = LogIndex() if args.query else None
+    query_entries: Dict[int, LogEntry] = {}
+
+    def on_query_batch(entries: List[LogEntry], _history) -> None:
+        for entry in entries:
+            query_entries[entry.id] = entry
+            query_index.add(entry.id, entry)
+
+    if query_index is not None:
+        store.subscribe_batch(on_query_batch, dispatch=DispatchPolicy(overflow="block"))
 
-    store.subscribe(on_entry)
+    columnar = None
+    if args.stats:
+        if HAS_NUMPY:
+            columnar = ColumnarHistory()
+            columnar.attach(store)
+        else:
+            emit("warn", "ColumnarUnavailable", {"reason": "numpy not installed"})
 
     if args.project:
-        tail = MetroTail(store)
-        tail.start(args.project)
-    elif args.stdin:
-        emit("info", "StdinMode", {})
-        for line in sys.stdin:
-            payload = parse_diagnostics_line(line)
-            if not payload:
-                continue
-            entry = to_log_entry(payload, source="stdin")
-            store.add(entry)
+        controller = IngestController(store)
+        for project in args.project:
+            project_dir, port = parse_project_arg(project)
+            controller.start_metro(project_dir, port=port)
+        try:
+            controller.wait_metro()
+        except KeyboardInterrupt:
+            controller.stop_metro()
+        for status in controller.metro_status():
+            emit("info", "MetroStatus", status)
+    elif args.stdin or args.import_paths:
+        if args.import_paths:
+            BulkImporter(store, workers=args.import_workers).run(args.import_paths)
+        else:
+            emit("info", "StdinMode", {})
+            with EntryBatcher(store) as batcher:
+                for entry in iter_log_entries_bytes(sys.stdin.buffer, source="stdin"):
+                    batcher.add(entry)
+        # Queued subscribers (printing, --stats) must catch up before the summary.
+        store.drain_subscribers()
+        if query_index is not None:
+            ids = query_index.search(args.query)
+            for entry in (query_entries[entry_id] for entry_id in ids):
+                emit(
+                    "info",
+                    "QueryMatch",
+                    {"id": entry.id, "level": entry.level, "message": entry.message},
+                    block=True,
+                )
+            emit("info", "QueryDone", {"query": args.query, "matches": len(ids)})
+        if columnar is not None:
+            emit(
+                "info",
+                "Stats",
+                {
+                    "entries": len(columnar),
+                    "levels": columnar.level_counts(),
+                    "per_second": columnar.counts_per_level_per_second(),
+                    "top_messages": columnar.top_messages(10),
+                },
+            )
+    elif args.tail:
+        controller = IngestController(
+            store, tail_offsets=TailOffsets(args.tail_state) if args.tail_state else None
+        )
+        for path in args.tail:
+            controller.start_tail(path, from_end=args.tail_from_end)
+        try:
+            while True:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            controller.stop_tail()
     elif args.ws:
-        server = WebSocketIngestServer(store, host=args.ws_host, port=args.ws_port)
+        server = WebSocketIngestServer(
+            store, host=args.ws_host, port=args.ws_port, limits=ws_limits_from_args(args)
+        )
         server.start()
         emit("info", "WebSocketReady", {"host": args.ws_host, "port": args.ws_port})
         try:
@@ -52,9 +187,20 @@ def main(argv: Optional[list[str]] = None) -> int:
                 time.sleep(0.5)
         except KeyboardInterrupt:
             server.stop()
+            for stats in server.sessions.stats():
+                emit("info", "SessionStats", stats)
     else:
         emit("warn", "NoSourceConfigured", {})
 
+    store.drain_subscribers(timeout=5.0)
+    for stats in store.subscriber_stats():
+        emit("info", "SubscriberStats", stats)
+    if store.dedupe is not None:
+        emit("info", "DedupeStats", store.dedupe.stats())
+    if metrics_server is not None:
+        metrics_server.stop()
+    if journal:
+        journal.close()
     return 0
 
 
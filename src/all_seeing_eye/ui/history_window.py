@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+
+from PySide6 import QtCore, QtGui, QtWidgets
+
+from ..core.journal_reader import JournalReader
+from .models import JournalListModel
+
+
+class JournalHistoryWindow(QtWidgets.QDialog):
+    """Scrollable view over the whole persisted journal, decoded lazily row by row."""
+
+    def __init__(self, journal_dir: str, parent: QtWidgets.QWidget | None = None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Journal History")
+        self.resize(1000, 640)
+
+        self._reader = JournalReader(journal_dir)
+        self._model = JournalListModel(self._reader)
+
+        self._list = QtWidgets.QListView()
+        # Uniform sizes stop Qt from measuring every row, which matters at millions of rows.
+        self._list.setUniformItemSizes(True)
+        self._list.setModel(self._model)
+        self._list.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
+
+        self._details = QtWidgets.QTextEdit()
+        self._details.setReadOnly(True)
+        self._details.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+
+        self._count = QtWidgets.QLabel()
+
+        splitter = QtWidgets.QSplitter()
+        splitter.addWidget(self._list)
+        splitter.addWidget(self._details)
+        splitter.setSizes([600, 400])
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(splitter, 1)
+        layout.addWidget(self._count)
+
+        self._list.selectionModel().selectionChanged.connect(self._on_selection)
+        self.finished.connect(self._release)
+        self.setAttribute(QtCore.Qt.WidgetAttribute.WA_DeleteOnClose)
+
+        self._refresh_timer = QtCore.QTimer(self)
+        self._refresh_timer.setInterval(1000)
+        self._refresh_timer.timeout.connect(self._refresh)
+        self._refresh_timer.start()
+        self._refresh()
+
+    def _refresh(self) -> None:
+        self._model.refresh()
+        self._count.setText(f"journal rows: {self._model.rowCount()}")
+
+    def _on_selection(self, selected, _deselected) -> None:
+        if not selected.indexes():
+            self._details.clear()
+            return
+        entry_obj = self._model.data(selected.indexes()[0], JournalListModel.EntryRole)
+        if not entry_obj:
+            self._details.clear()
+            return
+        self._details.setPlainText(json.dumps(entry_obj, indent=2, default=str))
+
+    def _release(self, _result: int) -> None:
+        self._refresh_timer.stop()
+        self._reader.close()
@@ -1,60 +1,209 @@
 from __future__ import annotations
 
 import json
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
 from datetime import datetime
+from typing import List, Optional, Sequence, Set
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
+from ..core.bulk_import import BulkImporter, ImportProgress
+from ..core.columnar import ColumnarHistory
 from ..core.controller import IngestController
-from ..core.health import check_tcp_listener
+from ..core.health import PortHealth
 from ..core.log_store import LogStore
-from .models import LogListModel
-
-
-class _LogBridge(QtCore.QObject):
-    entry_received = QtCore.Signal(object)
+from ..core.log_types import LogEntry
+from ..core.logger import emit
+from ..core.metrics import NS, REGISTRY
+from ..core.search import LogIndex, LogQuery, is_structured_query, parse_query
+from ..core.spill import SpillFile
+from .history_window import JournalHistoryWindow
+from .models import DEFAULT_MAX_ROWS, LogListModel
+
+DRAIN_INTERVAL_MS = 33  # ~30 Hz
+MAX_PENDING_ENTRIES = 50_000
+SPILL_PAGE_ROWS = 500
+METRICS_REFRESH_MS = 1000
+
+_UI_DROPPED = REGISTRY.counter("ase_ui_dropped_total", "Entries dropped from the full UI ingest queue")
+_UI_DRAIN = REGISTRY.histogram("ase_ui_drain_seconds", "Time one UI drain tick spent updating the model", scale=NS)
+_UI_DRAIN_BATCH = REGISTRY.histogram("ase_ui_drain_entries", "Entries taken per UI drain tick")
+
+
+class _IngestQueue:
+    """
+    Thread-safe hand-off between ingest threads and the UI thread.
+    Producers only append; the drain timer takes everything pending in one go.
+    When full, the oldest pending entries are dropped and counted.
+    """
+
+    def __init__(self, max_pending: int = MAX_PENDING_ENTRIES) -> None:
+        self._pending: deque[LogEntry] = deque()
+        self._max_pending = max_pending
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def push(self, entries: Sequence[LogEntry]) -> None:
+        with self._lock:
+            self._pending.extend(entries)
+            overflow = len(self._pending) - self._max_pending
+            for _ in range(max(0, overflow)):
+                self._pending.popleft()
+            self._dropped += max(0, overflow)
+        if overflow > 0:
+            _UI_DROPPED.inc(overflow)
+
+    def drain(self) -> List[LogEntry]:
+        with self._lock:
+            batch = list(self._pending)
+            self._pending.clear()
+        return batch
 
 
 class _StatusBridge(QtCore.QObject):
     ws_changed = QtCore.Signal(bool)
     metro_changed = QtCore.Signal(bool)
+    import_progress = QtCore.Signal(object)
+    health_changed = QtCore.Signal(object)
+
 
+class _LogFilterProxy(QtCore.QAbstractProxyModel):
+    """
+    Filtering proxy that keeps the sorted list of accepted source rows.
+    Narrowing the filter rescans only rows that matched before, and rows added to the
+    source are tested once on arrival instead of invalidating the whole filter.
+    Structured queries (`level:error`, `data.key:value`, `OR`, `since:`) use the same
+    `LogQuery` semantics as `LogStore.search`; full rescans are answered from the source
+    model's `LogIndex`.
+    """
 
-class _LogFilterProxy(QtCore.QSortFilterProxyModel):
     def __init__(self) -> None:
         super().__init__()
-        self._query = ""
+        self._query: str | LogQuery = ""
         self._levels = {"debug", "info", "warn", "error"}
+        self._rows: List[int] = []
+
+    def setSourceModel(self, model: LogListModel) -> None:  # type: ignore[override]
+        super().setSourceModel(model)
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        model.rowsRemoved.connect(self._on_rows_removed)
+        model.modelReset.connect(self._on_model_reset)
+        model.dataChanged.connect(self._on_data_changed)
+        self._on_model_reset()
+
+    def set_filter(self, query: str, levels: set[str]) -> None:
+        text = (query or "").strip()
+        parsed: str | LogQuery = parse_query(text) if is_structured_query(text) else text.lower()
+        levels = set(levels)
+        if parsed == self._query and levels == self._levels:
+            return
+        model = self.sourceModel()
+        narrowing = (
+            isinstance(parsed, str)
+            and isinstance(self._query, str)
+            and self._query in parsed
+            and levels <= self._levels
+        )
+        candidates = self._rows if narrowing else range(model.rowCount())
+        self._query = parsed
+        self._levels = levels
 
-    def set_query(self, query: str) -> None:
-        self._query = (query or "").strip().lower()
-        self.invalidateFilter()
+        self.layoutAboutToBeChanged.emit()
+        old = self.persistentIndexList()
+        sources = [self.mapToSource(i) for i in old]
+        self._rows = model.filter_rows(candidates, parsed, levels)
+        self.changePersistentIndexList(old, [self.mapFromSource(i) for i in sources])
+        self.layoutChanged.emit()
 
-    def set_levels(self, levels: set[str]) -> None:
-        self._levels = set(levels)
-        self.invalidateFilter()
+    def index(self, row: int, column: int, parent=QtCore.QModelIndex()):  # type: ignore[override]
+        if parent.isValid() or not 0 <= row < len(self._rows) or column != 0:
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column)
 
-    def filterAcceptsRow(self, source_row: int, source_parent: QtCore.QModelIndex) -> bool:  # type: ignore[override]
-        model = self.sourceModel()
-        if model is None:
-            return True
-        idx = model.index(source_row, 0, source_parent)
-        level = model.data(idx, LogListModel.LevelRole)
-        message = model.data(idx, LogListModel.MessageRole) or ""
-        source = model.data(idx, LogListModel.SourceRole) or ""
+    def parent(self, _index=QtCore.QModelIndex()):  # type: ignore[override]
+        return QtCore.QModelIndex()
 
-        if level not in self._levels:
-            return False
+    def rowCount(self, parent=QtCore.QModelIndex()):  # type: ignore[override]
+        return 0 if parent.isValid() else len(self._rows)
 
-        if not self._query:
-            return True
+    def columnCount(self, parent=QtCore.QModelIndex()):  # type: ignore[override]
+        return 0 if parent.isValid() else 1
 
-        hay = f"{level} {source} {message}".lower()
-        return self._query in hay
+    def mapToSource(self, proxy_index):  # type: ignore[override]
+        model = self.sourceModel()
+        if model is None or not proxy_index.isValid() or proxy_index.row() >= len(self._rows):
+            return QtCore.QModelIndex()
+        return model.index(self._rows[proxy_index.row()], proxy_index.column())
+
+    def mapFromSource(self, source_index):  # type: ignore[override]
+        if not source_index.isValid():
+            return QtCore.QModelIndex()
+        pos = bisect_left(self._rows, source_index.row())
+        if pos == len(self._rows) or self._rows[pos] != source_index.row():
+            return QtCore.QModelIndex()
+        return self.createIndex(pos, source_index.column())
+
+    def _on_model_reset(self) -> None:
+        model = self.sourceModel()
+        self.beginResetModel()
+        self._rows = model.filter_rows(range(model.rowCount()), self._query, self._levels)
+        self.endResetModel()
+
+    def _on_rows_inserted(self, _parent, first: int, last: int) -> None:
+        count = last - first + 1
+        pos = bisect_left(self._rows, first)
+        # Re-point existing rows at their new source positions before announcing the insert.
+        self._rows[pos:] = [r + count for r in self._rows[pos:]]
+        accepted = self.sourceModel().filter_rows(range(first, last + 1), self._query, self._levels)
+        if not accepted:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), pos, pos + len(accepted) - 1)
+        self._rows[pos:pos] = accepted
+        self.endInsertRows()
+
+    def _on_rows_about_to_be_removed(self, _parent, first: int, last: int) -> None:
+        lo = bisect_left(self._rows, first)
+        hi = bisect_right(self._rows, last)
+        if lo < hi:
+            self.beginRemoveRows(QtCore.QModelIndex(), lo, hi - 1)
+
+    def _on_rows_removed(self, _parent, first: int, last: int) -> None:
+        count = last - first + 1
+        lo = bisect_left(self._rows, first)
+        hi = bisect_right(self._rows, last)
+        self._rows[lo:] = [r - count for r in self._rows[hi:]]
+        if lo < hi:
+            self.endRemoveRows()
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()) -> None:
+        lo = bisect_left(self._rows, top_left.row())
+        hi = bisect_right(self._rows, bottom_right.row())
+        if lo < hi:
+            self.dataChanged.emit(self.index(lo, 0), self.index(hi - 1, 0), roles)
 
 
 class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self, store: LogStore, controller: IngestController) -> None:
+    def __init__(
+        self,
+        store: LogStore,
+        controller: IngestController,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        spill_to_disk: bool = False,
+        journal_dir: str | None = None,
+        columnar: ColumnarHistory | None = None,
+    ) -> None:
         super().__init__()
         self.setWindowTitle("All Seeing Eye")
         self.resize(1100, 720)
@@ -65,22 +214,38 @@ class MainWindow(QtWidgets.QMainWindow):
         self._paused = False
         self._auto_scroll = True
         self._last_ingest: datetime | None = None
-
-        self._model = LogListModel(store.get_all())
+        self._journal_dir = journal_dir
+        self._columnar = columnar
+        # Session keys shown in the view; None shows every source.
+        self._session_filter: Optional[Set[str]] = None
+
+        self._spill = SpillFile() if spill_to_disk else None
+        self._model = LogListModel(
+            store.get_all(),
+            max_rows=max_rows,
+            spill=self._spill,
+            columnar=columnar,
+            repeats=store.dedupe,
+            index=LogIndex(),
+        )
         self._proxy = _LogFilterProxy()
         self._proxy.setSourceModel(self._model)
 
-        self._bridge = _LogBridge()
-        self._bridge.entry_received.connect(self._append_log)
+        self._ingest_queue = _IngestQueue()
 
         self._status_bridge = _StatusBridge()
         self._status_bridge.ws_changed.connect(self._set_ws_running)
         self._status_bridge.metro_changed.connect(self._set_metro_running)
+        self._status_bridge.import_progress.connect(self._set_import_progress)
+        self._status_bridge.health_changed.connect(self._refresh_health)
+        self._health_port: Optional[int] = None
+        self._importer: Optional[BulkImporter] = None
+        self._import_thread: Optional[threading.Thread] = None
 
         self._build_ui()
         self._wire_controller()
 
-        self._store.subscribe(self._on_log_entry)
+        self._store.subscribe_batch(self._on_log_batch)
 
         # Initial state
         self._set_ws_running(self._controller.ws_running())
@@ -94,8 +259,90 @@ class MainWindow(QtWidgets.QMainWindow):
         self.activateWindow()
         self.show()
 
+    def import_files(self, paths: Sequence[str], workers: Optional[int] = None) -> None:
+        """Bulk-import `paths` ("-" for stdin) on a background thread, with progress in the status bar."""
+        if self._importer is not None:
+            return
+        self._importer = BulkImporter(
+            self._store, workers=workers, on_progress=self._status_bridge.import_progress.emit
+        )
+        self._import_bar.setVisible(True)
+        self._import_thread = threading.Thread(
+            target=self._run_import, args=(list(paths),), name="ase-import", daemon=True
+        )
+        self._import_thread.start()
+
+    def _choose_import_files(self) -> None:
+        paths, _ = QtWidgets.QFileDialog.getOpenFileNames(
+            self, "Import Logs", "", "Logs (*.log *.txt *.gz *.zst);;All files (*)"
+        )
+        if paths:
+            self.import_files(paths)
+
+    def _choose_tail_file(self) -> None:
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Follow Log File", "", "All files (*)")
+        if path:
+            self._controller.start_tail(path)
+
+    def cancel_import(self, timeout: float = 5.0) -> None:
+        """Cancel a running import and wait for what it already parsed to reach the store."""
+        if self._importer is not None:
+            self._importer.cancel()
+        if self._import_thread is not None:
+            self._import_thread.join(timeout)
+
+    def _run_import(self, paths: List[str]) -> None:
+        try:
+            self._importer.run(paths)
+        except Exception as exc:
+            emit("error", "ImportFailed", {"inputs": paths, "error": str(exc)})
+            self._status_bridge.import_progress.emit(ImportProgress(done=True))
+
+    def _set_import_progress(self, progress: ImportProgress) -> None:
+        fraction = progress.fraction
+        if fraction is None:
+            # Unknown total (stdin): a busy indicator with the running entry count.
+            self._import_bar.setRange(0, 0)
+        else:
+            self._import_bar.setRange(0, 1000)
+            self._import_bar.setValue(int(fraction * 1000))
+        self._import_bar.setFormat(f"import: {progress.entries} entries")
+        self._import_bar.setToolTip(
+            f"{progress.lines} lines ({progress.lines_per_s:,.0f}/s), "
+            f"{progress.diagnostics} diagnostics, {progress.failures} parse failures"
+        )
+        if progress.done:
+            # Leave the finished import's summary in the bar until the next import.
+            self._importer = None
+            self._import_bar.setRange(0, 1)
+            self._import_bar.setValue(1)
+            self._import_bar.setFormat(f"imported {progress.entries} entries, {progress.failures} failed")
+
     def _build_menu(self) -> None:
         menubar = self.menuBar()
+
+        file_menu = menubar.addMenu("File")
+        action_import = QtGui.QAction("Import Logs...", self)
+        action_import.triggered.connect(self._choose_import_files)
+        file_menu.addAction(action_import)
+        action_tail = QtGui.QAction("Follow Log File...", self)
+        action_tail.triggered.connect(self._choose_tail_file)
+        file_menu.addAction(action_tail)
+        action_stop_tail = QtGui.QAction("Stop Following Files", self)
+        action_stop_tail.triggered.connect(lambda: self._controller.stop_tail())
+        file_menu.addAction(action_stop_tail)
+
+        view_menu = menubar.addMenu("View")
+        view_menu.addAction(self._metrics_dock.toggleViewAction())
+        if self._journal_dir:
+            action_history = QtGui.QAction("Journal History", self)
+            action_history.triggered.connect(self._show_history)
+            view_menu.addAction(action_history)
+        if self._columnar is not None:
+            action_stats = QtGui.QAction("Log Statistics", self)
+            action_stats.triggered.connect(self._show_stats)
+            view_menu.addAction(action_stats)
+
         help_menu = menubar.addMenu("Help")
 
         action_howto = QtGui.QAction("How To Use", self)
@@ -122,13 +369,23 @@ class MainWindow(QtWidgets.QMainWindow):
         toolbar.addWidget(self._copy_button)
         toolbar.addStretch(1)
 
+        self._session_button = QtWidgets.QToolButton()
+        self._session_button.setText("Sessions: all")
+        self._session_button.setPopupMode(QtWidgets.QToolButton.ToolButtonPopupMode.InstantPopup)
+        self._session_menu = QtWidgets.QMenu(self._session_button)
+        self._session_menu.aboutToShow.connect(self._populate_session_menu)
+        self._session_button.setMenu(self._session_menu)
+        toolbar.addWidget(self._session_button)
+
         self._sources = QtWidgets.QTabWidget()
         self._sources.addTab(self._build_ws_tab(), "WebSocket")
         self._sources.addTab(self._build_metro_tab(), "Metro")
 
         filter_row = QtWidgets.QHBoxLayout()
         self._search = QtWidgets.QLineEdit()
-        self._search.setPlaceholderText("Filter logs (message/source/level)...")
+        self._search.setPlaceholderText(
+            "Filter logs (text, level:error, data.key:value, a OR b, since:2026-02-06T16:00)..."
+        )
 
         self._lvl_debug = QtWidgets.QCheckBox("debug")
         self._lvl_info = QtWidgets.QCheckBox("info")
@@ -144,6 +401,7 @@ class MainWindow(QtWidgets.QMainWindow):
         filter_row.addWidget(self._lvl_error)
 
         self._list = QtWidgets.QListView()
+        self._list.setUniformItemSizes(True)
         self._list.setModel(self._proxy)
         self._list.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
 
@@ -165,6 +423,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.setCentralWidget(root)
 
         self.setStatusBar(QtWidgets.QStatusBar())
+        self._import_bar = QtWidgets.QProgressBar()
+        self._import_bar.setMaximumWidth(220)
+        self._import_bar.setVisible(False)
+        self.statusBar().addPermanentWidget(self._import_bar)
+        self._build_metrics_panel()
 
         # Wire UI events
         self._clear_button.clicked.connect(self._clear_logs)
@@ -179,16 +442,80 @@ class MainWindow(QtWidgets.QMainWindow):
         self._lvl_error.toggled.connect(self._on_filter_changed)
 
         self._list.selectionModel().selectionChanged.connect(self._on_selection)
+        self._list.verticalScrollBar().valueChanged.connect(self._on_scroll)
+
+        self._drain_timer = QtCore.QTimer(self)
+        self._drain_timer.setInterval(DRAIN_INTERVAL_MS)
+        self._drain_timer.timeout.connect(self._drain_ingest_queue)
+        self._drain_timer.start()
 
         self._status_timer = QtCore.QTimer(self)
         self._status_timer.setInterval(500)
         self._status_timer.timeout.connect(self._refresh_statusbar)
         self._status_timer.start()
 
-        self._health_timer = QtCore.QTimer(self)
-        self._health_timer.setInterval(1000)
-        self._health_timer.timeout.connect(self._refresh_health)
-        self._health_timer.start()
+        self._watch_health_port()
+
+    def _build_metrics_panel(self) -> None:
+        self._metrics_table = QtWidgets.QTableWidget(0, 3)
+        self._metrics_table.setHorizontalHeaderLabels(["Metric", "Labels", "Value"])
+        self._metrics_table.horizontalHeader().setStretchLastSection(True)
+        self._metrics_table.verticalHeader().setVisible(False)
+        self._metrics_table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self._metrics_dock = QtWidgets.QDockWidget("Pipeline Metrics", self)
+        self._metrics_dock.setObjectName("pipelineMetrics")
+        self._metrics_dock.setWidget(self._metrics_table)
+        self.addDockWidget(QtCore.Qt.DockWidgetArea.RightDockWidgetArea, self._metrics_dock)
+        self._metrics_dock.hide()
+        REGISTRY.gauge("ase_ui_queue_depth", "Entries waiting for the UI drain").set_function(
+            lambda: self._ingest_queue.depth
+        )
+
+        self._metrics_timer = QtCore.QTimer(self)
+        self._metrics_timer.setInterval(METRICS_REFRESH_MS)
+        self._metrics_timer.timeout.connect(self._refresh_metrics)
+        self._metrics_dock.visibilityChanged.connect(self._on_metrics_visibility)
+
+    def _on_metrics_visibility(self, visible: bool) -> None:
+        # The panel only costs anything while it is open.
+        if visible:
+            self._refresh_metrics()
+            self._metrics_timer.start()
+        else:
+            self._metrics_timer.stop()
+
+    def _refresh_metrics(self) -> None:
+        rows = REGISTRY.snapshot()
+        table = self._metrics_table
+        table.setRowCount(len(rows))
+        for row, (name, labels, value) in enumerate(rows):
+            text = str(value) if isinstance(value, int) else f"{value:.6g}"
+            for column, cell in enumerate((name, labels, text)):
+                item = table.item(row, column)
+                if item is None:
+                    item = QtWidgets.QTableWidgetItem()
+                    table.setItem(row, column, item)
+                item.setText(cell)
+
+    def _show_history(self) -> None:
+        JournalHistoryWindow(self._journal_dir, self).show()
+
+    def _show_stats(self) -> None:
+        counts = self._columnar.level_counts()
+        last_minute = self._columnar.counts_per_level_per_second(
+            since_ns=time.time_ns() - 60_000_000_000
+        )
+        lines = [f"Entries held: {len(self._columnar)}", ""]
+        for level in ("debug", "info", "warn", "error"):
+            per_second = last_minute.get(level, {})
+            peak = max(per_second.values(), default=0)
+            lines.append(
+                f"{level.upper():<6} {counts.get(level, 0):>8}   last 60 s: "
+                f"{sum(per_second.values())} (peak {peak}/s)"
+            )
+        lines += ["", "Top messages"]
+        lines += [f"{count:>8}  {message}" for message, count in self._columnar.top_messages(10)]
+        QtWidgets.QMessageBox.information(self, "Log Statistics", "\n".join(lines))
 
     def _show_howto(self) -> None:
         text = (
@@ -207,7 +534,8 @@ class MainWindow(QtWidgets.QMainWindow):
             "Controls\n"
             "- Pause: freezes the view (ingest continues in the background).\n"
             "- Auto-scroll: keep the newest log visible.\n"
-            "- Filter: search + level toggles.\n"
+            "- Filter: search + level toggles. Supports level:error, source:metro,\n"
+            "  data.key:value, `a OR b` and since:/until: ISO timestamps.\n"
             "- Copy Selected JSON: copies the selected entry as JSON.\n"
         )
         QtWidgets.QMessageBox.information(self, "How To Use", text)
@@ -268,7 +596,10 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self._metro_mode = QtWidgets.QComboBox()
         self._metro_mode.addItems(["expo start (npm run start)", "devlog expo (npm run devlog:expo)"])
-        self._metro_check = QtWidgets.QPushButton("Check 8081")
+        self._metro_port = QtWidgets.QSpinBox()
+        self._metro_port.setRange(1, 65535)
+        self._metro_port.setValue(8081)
+        self._metro_check = QtWidgets.QPushButton("Check port")
         self._metro_8081_dot = QtWidgets.QLabel("●")
         self._metro_8081_dot.setStyleSheet("color: #9aa0a6;")
         self._metro_8081_label = QtWidgets.QLabel("8081: unknown")
@@ -281,32 +612,58 @@ class MainWindow(QtWidgets.QMainWindow):
         layout.addWidget(self._metro_label, 0, 8)
 
         layout.addWidget(QtWidgets.QLabel("Mode"), 1, 0)
-        layout.addWidget(self._metro_mode, 1, 1, 1, 4)
+        layout.addWidget(self._metro_mode, 1, 1, 1, 3)
+        layout.addWidget(self._metro_port, 1, 4)
         layout.addWidget(self._metro_check, 1, 5)
         layout.addWidget(self._metro_8081_dot, 1, 7)
         layout.addWidget(self._metro_8081_label, 1, 8)
 
         self._metro_browse.clicked.connect(self._browse_project)
         self._metro_button.clicked.connect(self._toggle_metro)
-        self._metro_check.clicked.connect(self._refresh_health)
+        self._metro_check.clicked.connect(self._controller.health.refresh)
+        self._metro_project.textChanged.connect(self._sync_metro_button)
+        self._metro_port.valueChanged.connect(self._sync_metro_button)
+        self._metro_port.valueChanged.connect(self._watch_health_port)
 
         return w
 
     def _wire_controller(self) -> None:
         self._controller.set_ws_status_callback(self._status_bridge.ws_changed.emit)
         self._controller.set_metro_status_callback(self._status_bridge.metro_changed.emit)
-
-    def _on_log_entry(self, entry, _history) -> None:
-        self._bridge.entry_received.emit(entry)
-
-    @QtCore.Slot(object)
-    def _append_log(self, entry) -> None:
-        self._last_ingest = datetime.utcnow()
-        self._model.append_entry(entry)
-        if self._paused:
+        self._controller.health.set_change_callback(self._status_bridge.health_changed.emit)
+
+    def _on_log_batch(self, entries, _history) -> None:
+        # Runs on the ingest thread: only enqueue, the drain timer touches the model.
+        self._ingest_queue.push(entries)
+
+    def _drain_ingest_queue(self) -> None:
+        if self._store.dedupe is not None and not self._paused:
+            changed = self._store.dedupe.take_changed()
+            if changed:
+                self._model.refresh_repeats(changed)
+        batch = self._ingest_queue.drain()
+        if not batch:
             return
-        if self._auto_scroll:
+        started = time.perf_counter_ns()
+        _UI_DRAIN_BATCH.record(len(batch))
+        self._last_ingest = datetime.utcnow()
+        if self._session_filter is not None:
+            batch = [e for e in batch if e.source in self._session_filter]
+        self._model.append_entries(batch)
+        if not self._paused and self._auto_scroll:
+            self._model.release_paged()
             self._list.scrollToBottom()
+        _UI_DRAIN.record(time.perf_counter_ns() - started)
+
+    def _on_scroll(self, value: int) -> None:
+        if value != self._list.verticalScrollBar().minimum() or not self._model.can_page_in():
+            return
+        added = self._model.page_in(SPILL_PAGE_ROWS)
+        if not added:
+            return
+        # Keep the previously-top row in place so paging in doesn't jump the view.
+        anchor = self._proxy.mapFromSource(self._model.index(added, 0))
+        self._list.scrollTo(anchor, QtWidgets.QAbstractItemView.ScrollHint.PositionAtTop)
 
     def _clear_logs(self) -> None:
         # Minimal-impact: reset model based on current store history without mutating store internals.
@@ -317,7 +674,46 @@ class MainWindow(QtWidgets.QMainWindow):
         self._paused = paused
         if not paused:
             # Re-sync UI from store
-            self._model.set_entries(self._store.get_all())
+            self._model.set_entries(self._visible_history())
+
+    def _visible_history(self) -> List[LogEntry]:
+        if self._session_filter is None:
+            return self._store.get_all()
+        return self._controller.sessions.merged(self._session_filter)
+
+    def _populate_session_menu(self) -> None:
+        menu = self._session_menu
+        menu.clear()
+        action_all = menu.addAction("All sources")
+        action_all.setCheckable(True)
+        action_all.setChecked(self._session_filter is None)
+        action_all.triggered.connect(lambda: self._set_session_filter(None))
+        menu.addSeparator()
+        for session in self._controller.sessions.sessions():
+            state = "connected" if session.connections else "idle"
+            action = menu.addAction(f"{session.device} ({session.key}, {session.entries} logs, {state})")
+            action.setCheckable(True)
+            action.setChecked(self._session_filter is not None and session.key in self._session_filter)
+            # Checking several sessions merges them into one view.
+            action.toggled.connect(lambda checked, key=session.key: self._toggle_session(key, checked))
+
+    def _toggle_session(self, key: str, checked: bool) -> None:
+        selected = set(self._session_filter or ())
+        if checked:
+            selected.add(key)
+        else:
+            selected.discard(key)
+        self._set_session_filter(selected or None)
+
+    def _set_session_filter(self, keys: Optional[Set[str]]) -> None:
+        if keys == self._session_filter:
+            return
+        self._session_filter = keys
+        self._session_button.setText(
+            "Sessions: all" if keys is None else f"Sessions: {len(keys)} selected"
+        )
+        # Session ring buffers already hold each partition, so switching never scans the global history.
+        self._model.set_entries(self._visible_history())
 
     def _set_autoscroll(self, enabled: bool) -> None:
         self._auto_scroll = enabled
@@ -332,8 +728,7 @@ class MainWindow(QtWidgets.QMainWindow):
             levels.add("warn")
         if self._lvl_error.isChecked():
             levels.add("error")
-        self._proxy.set_levels(levels)
-        self._proxy.set_query(self._search.text())
+        self._proxy.set_filter(self._search.text(), levels)
 
     def _on_selection(self, selected, _deselected) -> None:
         if not selected.indexes():
@@ -373,14 +768,18 @@ class MainWindow(QtWidgets.QMainWindow):
         project = self._metro_project.text().strip()
         if not project:
             return
-        if self._controller.metro_running():
-            self._controller.stop_metro()
+        port = self._metro_port.value()
+        if self._controller.metro_running(project, port):
+            self._controller.stop_metro(project, port)
+            # Stopping unwatches the port; the health dot still follows the entered one.
+            self._watch_health_port()
         else:
             mode = self._metro_mode.currentText()
             if mode.startswith("devlog expo"):
-                self._controller.start_metro(project, command=["npm", "run", "devlog:expo"])
+                self._controller.start_metro(project, command=["npm", "run", "devlog:expo"], port=port)
             else:
-                self._controller.start_metro(project, command=["npm", "run", "start"])
+                self._controller.start_metro(project, command=["npm", "run", "start"], port=port)
+        self._sync_metro_button()
 
     def _browse_project(self) -> None:
         path = QtWidgets.QFileDialog.getExistingDirectory(self, "Select Expo Project Directory")
@@ -401,23 +800,49 @@ class MainWindow(QtWidgets.QMainWindow):
     @QtCore.Slot(bool)
     def _set_metro_running(self, running: bool) -> None:
         if running:
-            self._metro_label.setText("Running")
+            count = sum(1 for status in self._controller.metro_status() if status["running"])
+            self._metro_label.setText(f"Running ({count})")
             self._metro_dot.setStyleSheet("color: #10b981;")
-            self._metro_button.setText("Stop Metro")
         else:
             self._metro_label.setText("Stopped")
             self._metro_dot.setStyleSheet("color: #9aa0a6;")
-            self._metro_button.setText("Start Metro")
-
-    def _refresh_health(self) -> None:
-        # Keep this UI-only: quick port probe to help users avoid "stale red screen" when Metro isn't up.
-        health = check_tcp_listener("127.0.0.1", 8081)
-        if health.listening:
+        self._sync_metro_button()
+
+    def _sync_metro_button(self, *_args) -> None:
+        # The button acts on the project/port currently entered; other projects keep running.
+        running = self._controller.metro_running(self._metro_project.text().strip(), self._metro_port.value())
+        self._metro_button.setText("Stop Metro" if running else "Start Metro")
+
+    def _watch_health_port(self, *_args) -> None:
+        # Probes run on the controller's health monitor; the UI only reads its cache.
+        health = self._controller.health
+        port = self._metro_port.value()
+        if self._health_port is not None and self._health_port != port:
+            if not any(status["port"] == self._health_port for status in self._controller.metro_status()):
+                health.unwatch("127.0.0.1", self._health_port)
+        self._health_port = port
+        health.watch("127.0.0.1", port)
+        self._refresh_health()
+
+    def _refresh_health(self, *_args) -> None:
+        # Helps users avoid a "stale red screen" when Metro isn't up.
+        port = self._metro_port.value()
+        health: Optional[PortHealth] = self._controller.health.get("127.0.0.1", port)
+        if health is None:
+            self._metro_8081_dot.setStyleSheet("color: #9aa0a6;")
+            self._metro_8081_label.setText(f"{port}: checking")
+            return
+        if health.metro_running:
             self._metro_8081_dot.setStyleSheet("color: #10b981;")
-            self._metro_8081_label.setText("8081: listening")
+            self._metro_8081_label.setText(f"{port}: Metro running")
+        elif health.listening:
+            self._metro_8081_dot.setStyleSheet("color: #f59e0b;" if health.status else "color: #10b981;")
+            self._metro_8081_label.setText(f"{port}: listening")
         else:
             self._metro_8081_dot.setStyleSheet("color: #ef4444;")
-            self._metro_8081_label.setText("8081: not listening")
+            self._metro_8081_label.setText(f"{port}: not listening")
+        checked = datetime.fromtimestamp(health.checked_at).strftime("%H:%M:%S")
+        self._metro_8081_label.setToolTip(f"checked {checked}; /status: {health.status or '-'}")
 
     def _refresh_statusbar(self) -> None:
         total = self._model.rowCount()
@@ -425,6 +850,18 @@ class MainWindow(QtWidgets.QMainWindow):
         metro = "on" if self._controller.metro_running() else "off"
         paused = "paused" if self._paused else "live"
         last = self._last_ingest.isoformat(timespec="seconds") + "Z" if self._last_ingest else "-"
+        queued = self._ingest_queue.depth
+        dropped = self._ingest_queue.dropped
+        ws_stats = self._controller.ws_stats()
+        subscribers = ""
+        sub_stats = self._store.subscriber_stats()
+        if sub_stats:
+            lag = max(stats["lag_s"] for stats in sub_stats)
+            sub_dropped = sum(stats["dropped"] for stats in sub_stats)
+            subscribers = f"subscribers lag: {lag:.2f}s dropped: {sub_dropped} | "
         self.statusBar().showMessage(
-            f"ingest: ws={ws} metro={metro} | view: {paused} | logs: {total} | last: {last}"
+            f"ingest: ws={ws} metro={metro} | view: {paused} | logs: {total} | "
+            f"queue: {queued} dropped: {dropped} | {subscribers}"
+            f"ws clients: {ws_stats['connections']} queued: {ws_stats['queued']} "
+            f"dropped: {ws_stats['dropped']} | last: {last}"
         )
@@ -1,10 +1,23 @@
 from __future__ import annotations
 
-from typing import List
+from array import array
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
 
 from PySide6 import QtCore
 
-from ..core.log_types import LogEntry
+from ..core.columnar import ColumnarHistory
+from ..core.dedupe import Deduplicator, RepeatInfo
+from ..core.journal_reader import JournalReader
+from ..core.log_types import LogEntry, entry_to_dict
+from ..core.search import LogIndex, LogQuery
+from ..core.spill import SpillFile
+
+DEFAULT_MAX_ROWS = 20_000
+EVICT_BATCH_ROWS = 1_000
+# Below this many rows the per-row filter is cheaper than building id arrays.
+COLUMNAR_MIN_ROWS = 2_048
+# Below this many rows the per-row filter is cheaper than a full index lookup.
+INDEX_MIN_ROWS = 2_048
 
 
 class LogListModel(QtCore.QAbstractListModel):
@@ -14,10 +27,42 @@ class LogListModel(QtCore.QAbstractListModel):
     DataRole = QtCore.Qt.ItemDataRole.UserRole + 4
     SourceRole = QtCore.Qt.ItemDataRole.UserRole + 5
     EntryRole = QtCore.Qt.ItemDataRole.UserRole + 6
+    RepeatRole = QtCore.Qt.ItemDataRole.UserRole + 7
 
-    def __init__(self, entries: List[LogEntry] | None = None) -> None:
+    def __init__(
+        self,
+        entries: List[LogEntry] | None = None,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        spill: Optional[SpillFile] = None,
+        columnar: Optional[ColumnarHistory] = None,
+        repeats: Optional[Deduplicator] = None,
+        index: Optional[LogIndex] = None,
+    ) -> None:
+        """
+        `max_rows` caps resident rows (0 disables the cap); older rows are evicted from the
+        head in batches of `EVICT_BATCH_ROWS`. With a `spill` file, evicted rows are written
+        to disk and can be paged back in with `page_in`. With a `columnar` history, level and
+        time filters over large row ranges run as vectorized masks. With `repeats`, rows of
+        entries that repeated show "×N". With an `index`, resident rows are indexed by their
+        position in the spill numbering (stable across eviction and `page_in`) and queries
+        over large row ranges are answered from it instead of testing every row.
+        """
         super().__init__()
         self._entries: List[LogEntry] = entries or []
+        # Lowercased "level source message" per row, computed once when the row arrives.
+        self._keys: List[str] = [_search_key(e) for e in self._entries]
+        self._ids = array("q", (e.id for e in self._entries))
+        self._columnar = columnar
+        self._repeats = repeats
+        self._max_rows = max_rows
+        self._spill = spill
+        # Position of the first resident row in the spill file's numbering.
+        self._base = 0
+        self._paged_in = 0
+        self._index = index
+        if index is not None:
+            index.clear()
+            self._index_rows(0, self._entries)
 
     def rowCount(self, parent=QtCore.QModelIndex()):  # type: ignore[override]
         return len(self._entries)
@@ -26,28 +71,8 @@ class LogListModel(QtCore.QAbstractListModel):
         if not index.isValid():
             return None
         entry = self._entries[index.row()]
-        if role == QtCore.Qt.ItemDataRole.DisplayRole:
-            return f"{entry.timestamp.isoformat()}  {entry.level.upper()}  {entry.message}"
-        if role == self.TimestampRole:
-            return entry.timestamp.isoformat()
-        if role == self.LevelRole:
-            return entry.level
-        if role == self.MessageRole:
-            return entry.message
-        if role == self.DataRole:
-            return entry.data
-        if role == self.SourceRole:
-            return entry.source
-        if role == self.EntryRole:
-            return {
-                "id": entry.id,
-                "timestamp": entry.timestamp.isoformat(),
-                "level": entry.level,
-                "message": entry.message,
-                "source": entry.source,
-                "data": entry.data,
-            }
-        return None
+        repeat = self._repeats.repeat_info(entry.id) if self._repeats is not None else None
+        return entry_role_data(entry, role, repeat)
 
     def roles(self):  # type: ignore[override]
         return {
@@ -59,12 +84,215 @@ class LogListModel(QtCore.QAbstractListModel):
             self.EntryRole: b"entry",
         }
 
+    def filter_rows(self, rows: Iterable[int], query: str | LogQuery, levels: Set[str]) -> List[int]:
+        """Rows among `rows` whose level is in `levels` and that match `query`."""
+        if self._index is not None and query and isinstance(rows, range) and len(rows) >= INDEX_MIN_ROWS:
+            return self._search_index(rows, query, levels)
+        if self._columnar is not None and isinstance(rows, range) and len(rows) >= COLUMNAR_MIN_ROWS:
+            vetted, unchecked = self._columnar_prefilter(rows, query, levels)
+            if not query or (isinstance(query, LogQuery) and not query.clauses):
+                return sorted(vetted + self._match_rows(unchecked, query, levels))
+            return self._match_rows(sorted(vetted + unchecked), query, levels)
+        return self._match_rows(rows, query, levels)
+
+    def _columnar_prefilter(
+        self, rows: range, query: str | LogQuery, levels: Set[str]
+    ) -> Tuple[List[int], List[int]]:
+        """Split `rows` into those passing the level/time mask and those the history no longer holds."""
+        filters = {"levels": levels}
+        if isinstance(query, LogQuery):
+            if query.since is not None:
+                filters["since_ns"] = int(query.since * 1_000_000_000)
+            if query.until is not None:
+                filters["until_ns"] = int(query.until * 1_000_000_000)
+        matched, uncovered = self._columnar.match_ids(self._ids[rows.start : rows.stop], **filters)
+        return (matched + rows.start).tolist(), (uncovered + rows.start).tolist()
+
+    def _search_index(self, rows: range, query: str | LogQuery, levels: Set[str]) -> List[int]:
+        """Rows among `rows` from an index lookup; plain text is narrowed by the index, then checked."""
+        entries, keys, base = self._entries, self._keys, self._base
+        if isinstance(query, LogQuery):
+            positions = self._index.search(query)
+        else:
+            # The entry text the index holds starts with the row's search key, so its hits are a superset.
+            positions = self._index.search(LogQuery(clauses=(((False, query),),)))
+        matched = []
+        for position in positions:
+            row = position - base
+            if row not in rows or entries[row].level not in levels:
+                continue
+            if isinstance(query, str) and query not in keys[row]:
+                continue
+            matched.append(row)
+        return matched
+
+    def _match_rows(self, rows: Iterable[int], query: str | LogQuery, levels: Set[str]) -> List[int]:
+        entries, keys = self._entries, self._keys
+        if isinstance(query, LogQuery):
+            return [r for r in rows if entries[r].level in levels and query.matches(entries[r])]
+        if not query:
+            return [r for r in rows if entries[r].level in levels]
+        return [r for r in rows if query in keys[r] and entries[r].level in levels]
+
     def set_entries(self, entries: List[LogEntry]) -> None:
         self.beginResetModel()
         self._entries = entries
+        self._keys = [_search_key(e) for e in entries]
+        self._ids = array("q", (e.id for e in entries))
+        self._base = 0
+        self._paged_in = 0
+        if self._spill is not None:
+            self._spill.reset()
+        if self._index is not None:
+            self._index.clear()
+            self._index_rows(0, entries)
         self.endResetModel()
+        self._evict_overflow()
+
+    def refresh_repeats(self, entry_ids: Iterable[int]) -> None:
+        """Repaint the rows of `entry_ids` after their repeat counts changed."""
+        ids = self._ids
+        wanted = set(entry_ids)
+        if len(wanted) > 16:
+            rows = [row for row, entry_id in enumerate(ids) if entry_id in wanted]
+        else:
+            rows = []
+            for entry_id in wanted:
+                try:
+                    rows.append(ids.index(entry_id))
+                except ValueError:
+                    continue  # Not resident (evicted, filtered by session, or cleared).
+        roles = [QtCore.Qt.ItemDataRole.DisplayRole, self.RepeatRole, self.EntryRole]
+        for row in rows:
+            index = self.index(row, 0)
+            self.dataChanged.emit(index, index, roles)
 
     def append_entry(self, entry: LogEntry) -> None:
-        self.beginInsertRows(QtCore.QModelIndex(), len(self._entries), len(self._entries))
-        self._entries.append(entry)
+        self.append_entries([entry])
+
+    def append_entries(self, entries: Sequence[LogEntry]) -> None:
+        if not entries:
+            return
+        first = len(self._entries)
+        if self._index is not None:
+            self._index_rows(self._base + first, entries)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(entries) - 1)
+        self._entries.extend(entries)
+        self._keys.extend(_search_key(e) for e in entries)
+        self._ids.extend(e.id for e in entries)
+        self.endInsertRows()
+        self._evict_overflow()
+
+    def can_page_in(self) -> bool:
+        return self._spill is not None and self._base > 0
+
+    def page_in(self, count: int) -> int:
+        """Load up to `count` spilled rows back in above the current head; returns rows added."""
+        if not self.can_page_in():
+            return 0
+        start = max(0, self._base - count)
+        older = self._spill.read(start, self._base)
+        if not older:
+            return 0
+        if self._index is not None:
+            self._index_rows(start, older)
+        self.beginInsertRows(QtCore.QModelIndex(), 0, len(older) - 1)
+        self._entries[:0] = older
+        self._keys[:0] = [_search_key(e) for e in older]
+        self._ids[:0] = array("q", (e.id for e in older))
+        self.endInsertRows()
+        self._base -= len(older)
+        self._paged_in += len(older)
+        return len(older)
+
+    def release_paged(self) -> None:
+        """Allow rows brought back by `page_in` to be evicted again."""
+        self._paged_in = 0
+
+    def _evict_overflow(self) -> None:
+        if self._max_rows <= 0:
+            return
+        limit = self._max_rows + self._paged_in
+        if len(self._entries) <= limit + EVICT_BATCH_ROWS:
+            return
+        count = len(self._entries) - limit
+        evicted = self._entries[:count]
+        if self._spill is not None:
+            # Rows paged in earlier are already on disk; only write ones never spilled.
+            already = max(0, min(count, len(self._spill) - self._base))
+            self._spill.append(evicted[already:])
+        if self._index is not None:
+            for position, entry in enumerate(evicted, self._base):
+                self._index.remove(position, entry)
+        self.beginRemoveRows(QtCore.QModelIndex(), 0, count - 1)
+        del self._entries[:count]
+        del self._keys[:count]
+        del self._ids[:count]
+        self.endRemoveRows()
+        self._base += count
+
+    def _index_rows(self, first_position: int, entries: Sequence[LogEntry]) -> None:
+        for position, entry in enumerate(entries, first_position):
+            self._index.add(position, entry)
+
+
+def entry_role_data(entry: LogEntry, role, repeat: Optional[RepeatInfo] = None):
+    if role == QtCore.Qt.ItemDataRole.DisplayRole:
+        line = f"{entry.timestamp.isoformat()}  {entry.level.upper()}  {entry.message}"
+        return f"{line}  ×{repeat.count}" if repeat is not None else line
+    if role == LogListModel.TimestampRole:
+        return entry.timestamp.isoformat()
+    if role == LogListModel.LevelRole:
+        return entry.level
+    if role == LogListModel.MessageRole:
+        return entry.message
+    if role == LogListModel.DataRole:
+        return entry.data
+    if role == LogListModel.SourceRole:
+        return entry.source
+    if role == LogListModel.EntryRole:
+        payload = entry_to_dict(entry)
+        if repeat is not None:
+            payload["repeat"] = repeat.to_dict()
+        return payload
+    if role == LogListModel.RepeatRole:
+        return repeat.count if repeat is not None else 1
+    return None
+
+
+class JournalListModel(QtCore.QAbstractListModel):
+    """
+    Lazy list model over a persisted journal: `rowCount` comes from the reader's offset
+    index and rows are decoded only when a view asks for them, so resident memory stays
+    bounded by the reader's row cache regardless of journal size.
+    """
+
+    EntryRole = LogListModel.EntryRole
+
+    def __init__(self, reader: JournalReader) -> None:
+        super().__init__()
+        self._reader = reader
+        self._rows = len(reader)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):  # type: ignore[override]
+        return 0 if parent.isValid() else self._rows
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):  # type: ignore[override]
+        if not index.isValid():
+            return None
+        entry = self._reader.entry(index.row())
+        if entry is None:
+            return "<unreadable journal line>" if role == QtCore.Qt.ItemDataRole.DisplayRole else None
+        return entry_role_data(entry, role)
+
+    def refresh(self) -> None:
+        rows = self._reader.refresh()
+        if rows <= self._rows:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self._rows, rows - 1)
+        self._rows = rows
         self.endInsertRows()
+
+
+def _search_key(entry: LogEntry) -> str:
+    return f"{entry.level} {entry.source} {entry.message}".lower()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The package is run from source (`PYTHONPATH=src`), not installed.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
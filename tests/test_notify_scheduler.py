@@ -0,0 +1,84 @@
+import time
+
+from all_seeing_eye.core.log_types import new_entry
+from all_seeing_eye.core.notifier import NullNotifier
+from all_seeing_eye.core.notify_scheduler import NotificationScheduler, rollup_text
+
+ROLLUP_S = 0.05
+
+
+class RecordingNotifier(NullNotifier):
+    def __init__(self) -> None:
+        super().__init__()
+        self.bodies = []
+
+    def notify_summary(self, title: str, body: str) -> None:
+        super().notify_summary(title, body)
+        self.bodies.append(body)
+
+
+def _entries(messages, level="error"):
+    return [new_entry(ts_ns=time.time_ns(), level=level, message=message) for message in messages]
+
+
+def _wait_for(predicate, timeout_s: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_first_entry_shown_then_cooldown_rolls_up_repeats():
+    notifier = RecordingNotifier()
+    scheduler = NotificationScheduler(notifier, cooldown_s=60.0, rollup_s=ROLLUP_S)
+    scheduler.submit_many(_entries(["FetchFailed"] * 3))
+    assert _wait_for(lambda: notifier.summaries == 1)
+    scheduler.close()
+    assert notifier.notified == 1
+    assert notifier.bodies == ["2 new errors in 1 s"]
+    stats = scheduler.stats()
+    assert (stats["delivered"], stats["rolled_up"], stats["summaries"]) == (1, 2, 1)
+
+
+def test_info_entries_are_ignored():
+    notifier = NullNotifier()
+    scheduler = NotificationScheduler(notifier, rollup_s=ROLLUP_S)
+    scheduler.submit_many(_entries(["RenderCommit"] * 5, level="info"))
+    scheduler.close()
+    assert (notifier.notified, notifier.summaries) == (0, 0)
+
+
+def test_rollup_text_counts_and_plurals():
+    assert rollup_text({"error": 37}, 4.6) == ("37 new errors", "37 new errors in 5 s")
+    assert rollup_text({"warn": 1, "error": 3}, 0.2) == (
+        "3 new errors and 1 new warn",
+        "3 new errors and 1 new warn in 1 s",
+    )
+
+
+def test_per_minute_cap_folds_into_summary():
+    notifier = RecordingNotifier()
+    # A cap of 60/min allows a burst of 60 and then one notification per second.
+    scheduler = NotificationScheduler(notifier, rollup_s=ROLLUP_S, max_per_minute=60)
+    scheduler.submit_many(_entries([f"Failure {i}" for i in range(61)]))
+    assert _wait_for(lambda: scheduler.stats()["rolled_up"] == 1)
+    assert notifier.notified == 60
+    assert notifier.summaries == 0
+    assert scheduler.stats()["pending_rollup"] == 1
+    assert _wait_for(lambda: notifier.summaries == 1)
+    scheduler.close()
+    assert notifier.bodies[0].startswith("1 new error in ")
+
+
+def test_queue_overflow_is_counted_into_summary():
+    notifier = RecordingNotifier()
+    scheduler = NotificationScheduler(notifier, rollup_s=ROLLUP_S, max_queued=2)
+    scheduler.submit_many(_entries([f"Failure {i}" for i in range(5)]))
+    assert _wait_for(lambda: notifier.summaries == 1)
+    scheduler.close()
+    stats = scheduler.stats()
+    assert stats["dropped"] == 3
+    assert notifier.notified == 2
+    assert notifier.bodies == ["3 new errors in 1 s"]